@@ -1,13 +1,62 @@
 import streamlit as st
-from scraper.content_fetcher import get_all_article_links, extract_article_content
-from scraper.article_parser import parse_dialogue
-from processing.qa_generator import create_qa_pairs
-from processing.pdf_builder import create_pdf
-import tempfile
-import os
+from processing.llm_backend import BACKEND_PRESETS, create_backend
+from config import LLM_BACKEND, APP_POLL_INTERVAL
+from pipeline import NAMED_SPEAKERS, OTHER_SPEAKERS
+from jobs import JobManager, QUEUED, RUNNING, DONE, FAILED
+import logging
 import time
 import pandas as pd
 
+# Pipeline progress and errors go to the server console
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+@st.cache_resource
+def get_job_manager():
+    """The background job runner and article result cache shared by every session"""
+    return JobManager()
+
+def show_job(job):
+    """Render a job snapshot: progress, per-article log and, once finished, the results"""
+    total = max(job['total'], 1)
+    st.progress(min(job['completed'] / total, 1.0))
+    
+    if job['found_urls']:
+        st.info(f"Found {job['found_urls']} articles, {job['new_urls']} not seen before")
+    if job['status'] == QUEUED:
+        st.info("Waiting for a free worker...")
+    elif job['status'] == RUNNING:
+        st.info(f"Processed {job['completed']}/{job['total']} articles ({job['cached']} from cache, {job['resumed']} resumed)")
+        if job['latest_pair']:
+            pair = job['latest_pair']
+            st.info(f"**{pair.speaker}** — Q: {pair.question}")
+    
+    # Articles are fetched concurrently and arrive in completion order
+    with st.expander("Article log", expanded=job['status'] != DONE):
+        for result in job['results']:
+            url = result['url']
+            if result['error']:
+                st.error(f"Error processing {url}: {result['error']}")
+                if result['traceback']:
+                    st.error(result['traceback'])
+            else:
+                st.write(f"Found {result['paragraphs']} paragraphs in {url}")
+                st.write(f"Detected speakers: {', '.join(result['speakers'])}")
+                if not result['skipped']:
+                    st.write(f"Generated {len(result['qa_pairs'])} Q&A pairs")
+    
+    if job['status'] == FAILED:
+        st.error(f"Processing failed: {job['error']}")
+    elif job['status'] == DONE:
+        processed_data = job['qa_pairs']
+        st.success(f"Processing complete! Generated {len(processed_data)} Q&A pairs")
+        if processed_data:
+            # Rendered in memory by the job and handed straight to the download button
+            st.session_state['pdf_data'] = job['pdf_data']
+            st.session_state['pdf_filename'] = f"chomsky_analysis_{len(processed_data)}_qa_pairs.pdf"
+            st.session_state['processed_data'] = processed_data
+        else:
+            st.error("No data was processed. Try adjusting your filters.")
+
 def main():
     st.set_page_config(page_title="Chomsky Archive Analyzer", page_icon="📚", layout="wide")
     
@@ -20,11 +69,21 @@ def main():
     # Sidebar controls
     st.sidebar.header("Configuration")
     
-    # API key input with default
+    # LLM provider; "mock" needs `python -m processing.mock_llm_server` running
+    backend_names = list(BACKEND_PRESETS)
+    backend_name = st.sidebar.selectbox(
+        "LLM backend",
+        backend_names,
+        index=backend_names.index(LLM_BACKEND) if LLM_BACKEND in backend_names else 0
+    )
+    
+    # API key input; left empty, the backend's environment variable is used
+    api_key_env = BACKEND_PRESETS[backend_name].get('api_key_env')
     api_key = st.sidebar.text_input(
-        "OpenRouter API Key", 
-        value="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",
-        type="password"
+        "LLM API Key", 
+        value="",
+        type="password",
+        help=f"Defaults to ${api_key_env}" if api_key_env else "Not needed for this backend"
     )
     
     # Article limit
@@ -39,95 +98,75 @@ def main():
     # Filter options
     include_interviews = st.sidebar.checkbox("Include interviews", value=True)
     include_solo_articles = st.sidebar.checkbox("Include solo articles", value=True)
+    full_archive = st.sidebar.checkbox(
+        "Crawl full archive",
+        value=False,
+        help="Follow index pagination and the sitemap instead of reading only the first articles page"
+    )
+    parallel_llm = st.sidebar.checkbox(
+        "Parallel LLM requests",
+        value=True,
+        help="Send each speaker's Q&A requests concurrently and stop once enough pairs are found"
+    )
+    batch_prompts = st.sidebar.checkbox(
+        "Batch themed and segment prompts",
+        value=False,
+        help="Ask several themes or segments per LLM request to cut round trips"
+    )
+    stream_llm = st.sidebar.checkbox(
+        "Stream LLM responses",
+        value=True,
+        help="Show Q&A pairs as they are generated and stop generating once enough are found"
+    )
+    only_new = st.sidebar.checkbox(
+        "Only new or changed articles",
+        value=False,
+        help="Skip articles already processed whose content has not changed"
+    )
     
     # Speaker filter
     speaker_filter = st.sidebar.multiselect(
         "Filter by speakers",
-        ["Noam Chomsky", "Vijay Prashad", "All other speakers"],
-        default=["Noam Chomsky"]
+        list(NAMED_SPEAKERS) + [OTHER_SPEAKERS],
+        default=["Noam Chomsky"],
+        help="Only these speakers' text is sent to the LLM; interviewer turns are always left out"
     )
     
     col1, col2 = st.columns(2)
     
+    manager = get_job_manager()
+    job = None
+    
     with col1:
         if st.button("🚀 Process Articles"):
-            if not api_key:
-                st.error("Please enter your OpenRouter API key first!")
+            # Per job, so one session's choice never redirects another's running job
+            backend = create_backend(backend_name, api_key=api_key or None)
+            if not backend.api_key and api_key_env:
+                st.error(f"Please enter your API key or set {api_key_env} first!")
                 return
-                
-            with st.spinner("Fetching article links..."):
-                # Scrape articles
-                base_url = "https://chomsky.info/articles/"
-                articles = get_all_article_links(base_url)
-                st.success(f"Found {len(articles)} articles")
-                
-                # Display progress bar
-                progress_bar = st.progress(0)
-                article_status = st.empty()
-                
-                processed_data = []
-                
-                for i, url in enumerate(articles[:article_limit]):
-                    article_status.info(f"Processing article {i+1}/{article_limit}: {url}")
-                    
-                    try:
-                        content = extract_article_content(url)
-                        paragraphs = parse_dialogue(content['html_content'], url)
-                        
-                        # Debug information
-                        st.write(f"Found {len(paragraphs)} paragraphs in {url}")
-                        speakers = set(p['speaker'] for p in paragraphs)
-                        st.write(f"Detected speakers: {', '.join(speakers)}")
-                        
-                        # Apply filters
-                        if paragraphs:
-                            # Skip based on interview/solo filters
-                            if len(speakers) > 1 and not include_interviews:
-                                continue
-                            if len(speakers) == 1 and not include_solo_articles:
-                                continue
-                                
-                            # Skip based on speaker filter
-                            if "Noam Chomsky" not in speaker_filter and "Noam Chomsky" in speakers:
-                                if "All other speakers" not in speaker_filter:
-                                    continue
-                            if "Vijay Prashad" not in speaker_filter and "Vijay Prashad" in speakers:
-                                if "All other speakers" not in speaker_filter:
-                                    continue
-                        
-                        qa_pairs = create_qa_pairs(paragraphs)
-                        
-                        # More debug information
-                        st.write(f"Generated {len(qa_pairs)} Q&A pairs")
-                        
-                        processed_data.extend(qa_pairs)
-                        
-                    except Exception as e:
-                        st.error(f"Error processing {url}: {str(e)}")
-                        import traceback
-                        st.error(traceback.format_exc())
-                    
-                    # Update progress
-                    progress_bar.progress((i + 1) / article_limit)
-                    time.sleep(0.1)  # Small delay for better UI experience
-                
-                article_status.success(f"Processing complete! Generated {len(processed_data)} Q&A pairs")
-                
-                # Generate PDF
-                if processed_data:
-                    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-                        create_pdf(processed_data, tmp.name)
-                        
-                        with open(tmp.name, "rb") as f:
-                            pdf_data = f.read()
-                            
-                        st.session_state['pdf_data'] = pdf_data
-                        st.session_state['pdf_filename'] = f"chomsky_analysis_{len(processed_data)}_qa_pairs.pdf"
-                        st.session_state['processed_data'] = processed_data
-                        
-                    os.unlink(tmp.name)
-                else:
-                    st.error("No data was processed. Try adjusting your filters.")
+            
+            # Link discovery and processing run in the background; identical requests share one job
+            st.session_state['job_id'] = manager.submit(
+                full_archive=full_archive,
+                limit=article_limit,
+                only_new=only_new,
+                include_interviews=include_interviews,
+                include_solo_articles=include_solo_articles,
+                speaker_filter=speaker_filter,
+                parallel=parallel_llm,
+                batched=batch_prompts,
+                stream=stream_llm,
+                backend=backend
+            )
+            for key in ('pdf_data', 'pdf_filename', 'processed_data'):
+                st.session_state.pop(key, None)
+        
+        if 'job_id' in st.session_state:
+            job = manager.get(st.session_state['job_id'])
+            if job is None:
+                del st.session_state['job_id']
+            else:
+                show_job(job)
     
     with col2:
         if 'pdf_data' in st.session_state:
@@ -146,10 +185,15 @@ def main():
                 sample_data = st.session_state['processed_data'][:5]  # Show first 5 items
                 
                 for i, qa in enumerate(sample_data):
-                    with st.expander(f"Q: {qa['question'][:50]}..."):
-                        st.markdown(f"**Speaker:** {qa['speaker']}")
-                        st.markdown(f"**Article:** {qa['article_title']}")
-                        st.markdown(f"**Answer:** {qa['answer'][:200]}...")
+                    with st.expander(f"Q: {qa.question[:50]}..."):
+                        st.markdown(f"**Speaker:** {qa.speaker}")
+                        st.markdown(f"**Article:** {qa.article.title}")
+                        st.markdown(f"**Answer:** {qa.answer[:200]}...")
+
+    # Poll the background job until it finishes
+    if job is not None and job['status'] in (QUEUED, RUNNING):
+        time.sleep(APP_POLL_INTERVAL)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""SQLite checkpoints of per-article pipeline progress, so interrupted runs can resume"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import CHECKPOINT_DB_PATH
+from records import paragraphs_from_dicts, qa_pairs_from_dicts
+
+RUNNING = 'running'
+COMPLETE = 'complete'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    settings TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    run_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    paragraphs TEXT,
+    result TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, url)
+);
+"""
+
+
+def run_id_for(settings):
+    """Stable run id for a settings dict, so rerunning the same command resumes the same run"""
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def _dump_result(result):
+    # Tracebacks only matter for failures, which are never checkpointed
+    data = {key: value for key, value in result.items() if key != 'traceback'}
+    data['speakers'] = sorted(result['speakers'])
+    data['qa_pairs'] = [pair.to_dict() for pair in result['qa_pairs']]
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _load_result(text, articles):
+    result = json.loads(text)
+    result['speakers'] = set(result['speakers'])
+    result['qa_pairs'] = qa_pairs_from_dicts(result['qa_pairs'], articles)
+    result['traceback'] = None
+    return result
+
+
+class CheckpointStore:
+    """SQLite-backed per-article checkpoints, grouped into runs.
+
+    An article's parsed paragraphs are saved before its Q&A pairs are
+    generated and its finished result afterwards, so a resumed run
+    neither fetches nor calls the LLM again for work already done.
+    """
+
+    def __init__(self, db_path=CHECKPOINT_DB_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def start_run(self, run_id, settings=None, resume=True):
+        """Open a run and return it bound as a RunCheckpoint.
+
+        An unfinished run with the same id keeps its checkpoints when
+        resume is set; a completed run, or resume=False, starts over.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT status FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            resumed = resume and row is not None and row['status'] != COMPLETE
+            if not resumed:
+                self._conn.execute("DELETE FROM checkpoints WHERE run_id = ?", (run_id,))
+            settings_json = json.dumps(settings, sort_keys=True)
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO runs (run_id, settings, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (run_id, settings_json, RUNNING, now, now),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE runs SET settings = ?, status = ?, updated_at = ? WHERE run_id = ?",
+                    (settings_json, RUNNING, now, run_id),
+                )
+        return RunCheckpoint(self, run_id, resumed)
+
+    def finish_run(self, run_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?", (COMPLETE, time.time(), run_id)
+            )
+
+    def load(self, run_id):
+        """Checkpointed articles of a run: url -> {'title', 'paragraphs', 'result'} (None when not reached)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, title, paragraphs, result FROM checkpoints WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        # Records of one article share a single Article again
+        articles = {}
+        return {
+            row['url']: {
+                'title': row['title'],
+                'paragraphs': (
+                    paragraphs_from_dicts(json.loads(row['paragraphs']), articles)
+                    if row['paragraphs'] is not None else None
+                ),
+                'result': _load_result(row['result'], articles) if row['result'] is not None else None,
+            }
+            for row in rows
+        }
+
+    def save_paragraphs(self, run_id, url, title, paragraphs):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, url, title, paragraphs, result, updated_at) "
+                "VALUES (?, ?, ?, ?, NULL, ?)",
+                (run_id, url, title, json.dumps([p.to_dict() for p in paragraphs], ensure_ascii=False), time.time()),
+            )
+
+    def save_result(self, run_id, url, result):
+        """Record a finished article; its paragraphs are no longer needed."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, url, title, paragraphs, result, updated_at) "
+                "VALUES (?, ?, ?, NULL, ?, ?)",
+                (run_id, url, result.get('title'), _dump_result(result), time.time()),
+            )
+
+    def runs(self):
+        """All runs, most recently updated first, with their checkpoint counts."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT runs.*, COUNT(checkpoints.url) AS articles, COUNT(checkpoints.result) AS finished "
+                "FROM runs LEFT JOIN checkpoints ON checkpoints.run_id = runs.run_id "
+                "GROUP BY runs.run_id ORDER BY runs.updated_at DESC"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+class RunCheckpoint:
+    """A CheckpointStore bound to one run, as passed to pipeline.process_articles()"""
+
+    def __init__(self, store, run_id, resumed):
+        self.store = store
+        self.run_id = run_id
+        self.resumed = resumed
+
+    def load(self):
+        return self.store.load(self.run_id)
+
+    def save_paragraphs(self, url, title, paragraphs):
+        self.store.save_paragraphs(self.run_id, url, title, paragraphs)
+
+    def save_result(self, url, result):
+        self.store.save_result(self.run_id, url, result)
+
+    def finish(self):
+        self.store.finish_run(self.run_id)
@@ -0,0 +1,212 @@
+"""Headless batch runner: fetch, parse, generate Q&A pairs and write PDF/JSON output
+
+Run it from the chomsky_analyzer directory, e.g. for a nightly job over
+the whole archive that only touches new or changed articles:
+
+    python cli.py --full-archive --only-new --format pdf json --output out/chomsky
+
+Progress is checkpointed per article. Rerunning an interrupted command
+resumes it: finished articles come from the checkpoint store and only the
+rest are fetched and sent to the LLM. Pass --restart to start over.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+from scraper.article_registry import ArticleRegistry
+from checkpoints import CheckpointStore, run_id_for
+from scraper.http_cache import configure_cache
+from processing.llm_backend import BACKEND_PRESETS, create_backend
+from processing.llm_cache import configure_llm_cache
+from processing.pdf_builder import create_pdf
+from pipeline import (
+    ARTICLES_URL,
+    EXCLUDED_SPEAKERS,
+    article_filter,
+    find_articles,
+    process_articles,
+    register_urls,
+    speaker_predicate,
+)
+from config import (
+    CACHE_DIR,
+    CHECKPOINT_DB_PATH,
+    HTTP_CACHE_DIR,
+    LLM_BACKEND,
+    LLM_CACHE_PATH,
+    LLM_MAX_WORKERS,
+    PDF_RENDER_PROCESSES,
+    REGISTRY_DB_PATH,
+    SCRAPER_MAX_WORKERS,
+)
+
+FORMATS = ('pdf', 'json')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Convert chomsky.info articles into Q&A pairs without the UI")
+    parser.add_argument('--url', default=ARTICLES_URL, help="Articles index to start from")
+    parser.add_argument('--limit', type=int, help="Maximum number of articles to process (default: all)")
+    parser.add_argument('--full-archive', action='store_true',
+                        help="Follow index pagination and the sitemap instead of reading only the first page")
+    parser.add_argument('--only-new', action='store_true',
+                        help="Skip articles already processed whose content has not changed")
+    parser.add_argument('--fetch-workers', type=int, default=SCRAPER_MAX_WORKERS,
+                        help="Concurrent article downloads")
+    parser.add_argument('--llm-workers', type=int, default=LLM_MAX_WORKERS,
+                        help="Concurrent LLM requests per speaker; 1 sends them one at a time")
+    parser.add_argument('--pdf-processes', type=int, default=PDF_RENDER_PROCESSES,
+                        help="Worker processes laying out PDF chapters")
+    parser.add_argument('--batched', action='store_true', help="Ask several themes or segments per LLM request")
+    parser.add_argument('--backend', choices=list(BACKEND_PRESETS), default=LLM_BACKEND, help="LLM backend preset")
+    parser.add_argument('--speaker', action='append', dest='speakers',
+                        help="Generate Q&A pairs only for this speaker (repeatable; default: every speaker)")
+    parser.add_argument('--keep-interviewer', action='store_true',
+                        help="Also generate Q&A pairs from interviewer turns, which are dropped by default")
+    parser.add_argument('--no-interviews', action='store_true', help="Skip articles with several speakers")
+    parser.add_argument('--no-solo', action='store_true', help="Skip single-speaker articles")
+    parser.add_argument('--format', nargs='+', choices=FORMATS, default=['pdf'], dest='formats',
+                        help="Output formats to write")
+    parser.add_argument('--output', default='chomsky_analysis',
+                        help="Output path without extension; each format adds its own")
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help="Directory for the HTTP cache, LLM cache and article registry")
+    parser.add_argument('--run-id', help="Name of the checkpointed run (default: derived from the settings)")
+    parser.add_argument('--restart', action='store_true',
+                        help="Discard checkpoints of an unfinished run with the same id instead of resuming it")
+    parser.add_argument('--quiet', action='store_true',
+                        help="Only print warnings, errors and the final summary, not per-article progress")
+    return parser.parse_args(argv)
+
+
+def configure_logging(quiet=False):
+    """Send pipeline log messages to stderr; quiet keeps only warnings and errors"""
+    logging.basicConfig(format='%(message)s')
+    logging.getLogger().setLevel(logging.WARNING if quiet else logging.INFO)
+
+
+def configure_caches(cache_dir):
+    """Point the HTTP cache and LLM cache at cache_dir; returns its article registry and checkpoint store"""
+    configure_cache(os.path.join(cache_dir, os.path.basename(HTTP_CACHE_DIR)))
+    configure_llm_cache(os.path.join(cache_dir, os.path.basename(LLM_CACHE_PATH)))
+    registry = ArticleRegistry(os.path.join(cache_dir, os.path.basename(REGISTRY_DB_PATH)))
+    checkpoints = CheckpointStore(os.path.join(cache_dir, os.path.basename(CHECKPOINT_DB_PATH)))
+    return registry, checkpoints
+
+
+def run_settings(args):
+    """The arguments that decide what a run produces; equal settings resume the same run"""
+    return {
+        'url': args.url,
+        'limit': args.limit,
+        'full_archive': args.full_archive,
+        'only_new': args.only_new,
+        'batched': args.batched,
+        'backend': args.backend,
+        'speakers': sorted(args.speakers) if args.speakers else None,
+        'keep_interviewer': args.keep_interviewer,
+        'no_interviews': args.no_interviews,
+        'no_solo': args.no_solo,
+    }
+
+
+def write_outputs(qa_pairs, output, formats, pdf_processes=1):
+    """Write the Q&A pairs in each requested format; returns the paths written"""
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    paths = []
+    for fmt in formats:
+        path = f"{output}.{fmt}"
+        if fmt == 'pdf':
+            create_pdf(qa_pairs, path, processes=pdf_processes)
+        elif fmt == 'json':
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump([pair.to_dict() for pair in qa_pairs], f, ensure_ascii=False, indent=2)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_logging(args.quiet)
+    log = (lambda message: None) if args.quiet else print
+    started = time.monotonic()
+
+    backend = create_backend(args.backend)
+    registry, checkpoints = configure_caches(args.cache_dir)
+    settings = run_settings(args)
+    run = checkpoints.start_run(args.run_id or run_id_for(settings), settings, resume=not args.restart)
+    try:
+        # Discovered links are registered and fetched as they arrive
+        counts = {'found': 0, 'new': 0}
+        articles = register_urls(
+            find_articles(args.url, full_archive=args.full_archive, max_workers=args.fetch_workers),
+            registry,
+            counts,
+        )
+        if run.resumed:
+            log(f"Resuming run {run.run_id}")
+
+        keep = article_filter(include_interviews=not args.no_interviews, include_solo_articles=not args.no_solo)
+        speaker_filter = speaker_predicate(args.speakers, excluded=() if args.keep_interviewer else EXCLUDED_SPEAKERS)
+        results = process_articles(
+            articles,
+            limit=args.limit,
+            registry=registry,
+            only_new=args.only_new,
+            keep=keep,
+            speaker_filter=speaker_filter,
+            fetch_workers=args.fetch_workers,
+            llm_workers=args.llm_workers,
+            batched=args.batched,
+            checkpoint=run,
+            backend=backend,
+        )
+
+        qa_pairs = []
+        processed = failed = skipped = resumed = 0
+        for result in results:
+            processed += 1
+            resumed += result['resumed']
+            if result['error']:
+                failed += 1
+                print(f"Error processing {result['url']}: {result['error']}", file=sys.stderr)
+            elif result['skipped']:
+                skipped += 1
+                log(f"[{processed}] Skipped {result['url']} (speakers: {', '.join(sorted(result['speakers']))})")
+            else:
+                qa_pairs.extend(result['qa_pairs'])
+                source = "checkpoint" if result['resumed'] else "new"
+                log(f"[{processed}] {len(result['qa_pairs'])} Q&A pairs from {result['url']} ({source})")
+        if not counts['found']:
+            # Discovery errors are printed and come back as no links, which must not look like success
+            print(f"No article links found at {args.url}", file=sys.stderr)
+            return 1
+        if not failed:
+            run.finish()
+    finally:
+        registry.close()
+        checkpoints.close()
+
+    paths = write_outputs(qa_pairs, args.output, args.formats, args.pdf_processes) if qa_pairs else []
+    print(
+        f"Found {counts['found']} articles ({counts['new']} not seen before). "
+        f"Processed {processed} articles ({failed} failed, {skipped} skipped, {resumed} from checkpoint), "
+        f"{len(qa_pairs)} Q&A pairs in {time.monotonic() - started:.1f}s"
+    )
+    for path in paths:
+        print(f"Wrote {path}")
+
+    if not qa_pairs:
+        print("No Q&A pairs were generated; nothing written")
+    # A run with nothing new to do is not an error; failed articles are
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import os
+
+# Scraper politeness: token-bucket rate per host and concurrent fetch workers
+SCRAPER_REQUESTS_PER_SECOND = 1.0
+SCRAPER_BURST = 2
+SCRAPER_MAX_WORKERS = 4
+
+# Shared HTTP client: (connect, read) timeouts, retry policy and per-host pool sizes
+HTTP_TIMEOUT = (5, 30)
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_MAX_RETRY_AFTER = 60
+HTTP_DEFAULT_POOL_SIZE = 4
+HTTP_POOL_SIZES = {
+    'chomsky.info': SCRAPER_MAX_WORKERS,
+    'api.groq.com': 8,
+}
+
+# Per-call timeouts for the scraper and the LLM endpoint
+SCRAPER_INDEX_TIMEOUT = 10
+SCRAPER_ARTICLE_TIMEOUT = 15
+LLM_TIMEOUT = 30
+
+# Local cache root; override with CHOMSKY_CACHE_DIR
+CACHE_DIR = os.environ.get(
+    'CHOMSKY_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache'),
+)
+
+# On-disk HTTP response cache for chomsky.info pages
+HTTP_CACHE_DIR = os.path.join(CACHE_DIR, 'http')
+HTTP_CACHE_TTL = 24 * 60 * 60
+# Index pages and sitemaps list new articles, so they are revalidated on every fetch
+HTTP_INDEX_CACHE_TTL = 0
+HTTP_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+# SQLite registry of discovered articles for incremental crawls
+REGISTRY_DB_PATH = os.path.join(CACHE_DIR, 'articles.db')
+
+# Per-article checkpoints of parsed paragraphs and Q&A pairs, used to resume interrupted runs
+CHECKPOINT_DB_PATH = os.path.join(CACHE_DIR, 'checkpoints.db')
+
+# Upper bound on index and sitemap pages fetched during full-archive discovery
+DISCOVERY_MAX_PAGES = 500
+
+# BeautifulSoup backend: lxml is much faster than the pure-Python parser when installed
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# Persistent LLM completion cache; set CHOMSKY_LLM_CACHE_BYPASS=1 to skip lookups
+LLM_CACHE_PATH = os.path.join(CACHE_DIR, 'llm_cache.db')
+LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024
+LLM_CACHE_BYPASS = os.environ.get('CHOMSKY_LLM_CACHE_BYPASS', '') not in ('', '0')
+
+# Concurrent LLM requests per speaker when create_qa_pairs runs in concurrent mode
+LLM_MAX_WORKERS = 4
+
+# LLM rate budgets override the backend preset's when set (CHOMSKY_LLM_RPM / CHOMSKY_LLM_TPM);
+# attempts per throttled call
+LLM_REQUESTS_PER_MINUTE = int(os.environ['CHOMSKY_LLM_RPM']) if os.environ.get('CHOMSKY_LLM_RPM') else None
+LLM_TOKENS_PER_MINUTE = int(os.environ['CHOMSKY_LLM_TPM']) if os.environ.get('CHOMSKY_LLM_TPM') else None
+LLM_MAX_ATTEMPTS = 6
+
+# Segments sent per request when create_qa_pairs runs in batched mode
+LLM_SEGMENT_BATCH_SIZE = 3
+
+# Prompt sizing in model tokens; 'heuristic' counts offline, 'tiktoken' is used if installed and selected
+LLM_TOKENIZER = os.environ.get('CHOMSKY_LLM_TOKENIZER', 'heuristic')
+LLM_CONTEXT_TOKENS = 8192
+LLM_PROMPT_OVERHEAD_TOKENS = 400
+LLM_SEGMENT_TOKENS = 2000
+LLM_EXCERPT_TOKENS = 1000
+# Segments shorter than this (about 100 words) are merged with their neighbours
+LLM_MIN_SEGMENT_TOKENS = 130
+
+# LLM backend preset ('groq', 'openrouter' or 'mock'); the CHOMSKY_LLM_* variables override its endpoint,
+# model and key. 'mock' talks to processing/mock_llm_server.py on MOCK_LLM_PORT.
+LLM_BACKEND = os.environ.get('CHOMSKY_LLM_BACKEND', 'groq')
+LLM_API_URL = os.environ.get('CHOMSKY_LLM_API_URL', '')
+LLM_MODEL = os.environ.get('CHOMSKY_LLM_MODEL', '')
+LLM_API_KEY = os.environ.get('CHOMSKY_LLM_API_KEY', '')
+MOCK_LLM_PORT = int(os.environ.get('CHOMSKY_MOCK_LLM_PORT', 8088))
+
+# Worker processes laying out PDF chapters; 1 renders in the calling process
+PDF_RENDER_PROCESSES = int(os.environ.get('CHOMSKY_PDF_PROCESSES', 1))
+
+# Optional Unicode TrueType fonts for PDFs, by style; styles without a file use the regular face.
+# Without them text is reduced to the Latin-1 range of the built-in fonts.
+PDF_UNICODE_FONT_DIR = os.environ.get('CHOMSKY_PDF_FONT_DIR', '')
+PDF_UNICODE_FONTS = {
+    '': 'DejaVuSans.ttf',
+    'B': 'DejaVuSans-Bold.ttf',
+    'I': 'DejaVuSans-Oblique.ttf',
+    'BI': 'DejaVuSans-BoldOblique.ttf',
+}
+
+# Streamlit app: seconds discovered links and per-article results stay cached, background
+# pipeline jobs run at once, cached article results kept, and seconds between progress polls
+APP_CACHE_TTL = 60 * 60
+APP_JOB_WORKERS = 2
+APP_RESULT_CACHE_SIZE = 2000
+APP_POLL_INTERVAL = 1.0
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import defaultdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import (
+    HTTP_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_MAX_RETRY_AFTER,
+    HTTP_POOL_SIZES,
+    HTTP_DEFAULT_POOL_SIZE,
+)
+
+# Status codes worth retrying; everything else is returned to the caller as-is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _empty_stats():
+    return {
+        'requests': 0,
+        'retries': 0,
+        'errors': 0,
+        'total_latency': 0.0,
+        'max_latency': 0.0,
+    }
+
+
+class HTTPClient:
+    """Shared keep-alive HTTP client with per-host pools, retries and counters."""
+
+    def __init__(self, timeout=HTTP_TIMEOUT, max_retries=HTTP_MAX_RETRIES,
+                 backoff_factor=HTTP_BACKOFF_FACTOR, pool_sizes=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.pool_sizes = dict(HTTP_POOL_SIZES if pool_sizes is None else pool_sizes)
+        self.session = requests.Session()
+        self._adapters = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(_empty_stats)
+
+    def _ensure_adapter(self, url):
+        """Mount a connection pool sized for the host of `url` on first use."""
+        parsed = urlparse(url)
+        prefix = f"{parsed.scheme}://{parsed.netloc}/"
+        with self._lock:
+            if prefix not in self._adapters:
+                size = self.pool_sizes.get(parsed.hostname, HTTP_DEFAULT_POOL_SIZE)
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, pool_block=False)
+                self.session.mount(prefix, adapter)
+                self._adapters[prefix] = adapter
+        return parsed.netloc
+
+    def _retry_delay(self, attempt, response=None):
+        """Seconds to wait before the next attempt, honoring Retry-After."""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after:
+                try:
+                    delay = float(retry_after)
+                except ValueError:
+                    try:
+                        delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    except (TypeError, ValueError):
+                        delay = None
+                if delay is not None:
+                    return min(max(delay, 0.0), HTTP_MAX_RETRY_AFTER)
+        return self.backoff_factor * (2 ** attempt)
+
+    def _record(self, host, latency=None, retried=False, error=False):
+        with self._lock:
+            stats = self._stats[host]
+            if latency is not None:
+                stats['requests'] += 1
+                stats['total_latency'] += latency
+                stats['max_latency'] = max(stats['max_latency'], latency)
+            if retried:
+                stats['retries'] += 1
+            if error:
+                stats['errors'] += 1
+
+    def request(self, method, url, timeout=None, max_retries=None, **kwargs):
+        """Send a request, retrying transient failures with backoff."""
+        host = self._ensure_adapter(url)
+        retries = self.max_retries if max_retries is None else max_retries
+        timeout = self.timeout if timeout is None else timeout
+
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                self._record(host, error=True)
+                if attempt >= retries:
+                    raise
+                delay = self._retry_delay(attempt)
+            else:
+                self._record(host, latency=time.monotonic() - start)
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                delay = self._retry_delay(attempt, response)
+                response.close()
+
+            self._record(host, retried=True)
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        """Per-host request, connection-reuse and latency counters."""
+        with self._lock:
+            snapshot = {host: dict(values) for host, values in self._stats.items()}
+            adapters = list(self._adapters.items())
+
+        for prefix, adapter in adapters:
+            host = urlparse(prefix).netloc
+            pools = adapter.poolmanager.pools
+            connections = 0
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+            stats = snapshot.setdefault(host, _empty_stats())
+            stats['connections'] = connections
+            stats['reused'] = max(stats['requests'] - connections, 0)
+
+        for stats in snapshot.values():
+            stats.setdefault('connections', 0)
+            stats.setdefault('reused', 0)
+            requests_made = stats['requests']
+            stats['avg_latency'] = stats['total_latency'] / requests_made if requests_made else 0.0
+        return snapshot
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide shared HTTPClient."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
+
+
+def get(url, **kwargs):
+    return get_client().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_client().post(url, **kwargs)
+
+
+def stats():
+    return get_client().stats()
@@ -0,0 +1,267 @@
+"""Background pipeline jobs shared by every Streamlit session
+
+The app keeps a single JobManager in st.cache_resource. Each job discovers
+article links and runs the pipeline on a worker thread, fetching articles
+as their links arrive, and records progress that the UI polls on every
+rerun. Identical requests join the job already running, and
+per-article results are kept for APP_CACHE_TTL seconds, so later runs with
+the same settings skip the fetch and the LLM calls for those articles.
+Progress is also checkpointed to disk, so resubmitting a job that was cut
+short by a server restart resumes it. Every job carries its own LLM
+backend. Jobs are keyed by their settings plus a fingerprint of the
+backend's endpoint and API key, so sessions with different credentials
+never join one job; cached per-article results are keyed by the backend
+and model only, and are shared across keys.
+"""
+import hashlib
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from scraper.article_registry import ArticleRegistry
+from checkpoints import CheckpointStore
+from processing.llm_backend import LLMBackend, create_backend
+from processing.pdf_builder import create_pdf
+from pipeline import ARTICLES_URL, article_filter, find_articles, process_articles, register_urls, speaker_predicate
+from config import (
+    APP_CACHE_TTL,
+    APP_JOB_WORKERS,
+    APP_RESULT_CACHE_SIZE,
+    LLM_MAX_WORKERS,
+    PDF_RENDER_PROCESSES,
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Settings that change what a single article produces, and so key its cached result
+_RESULT_SETTINGS = (
+    'include_interviews', 'include_solo_articles', 'speaker_filter', 'parallel', 'batched', 'stream',
+    'backend', 'model',
+)
+
+
+def _settings_key(settings, names=None):
+    items = {name: settings[name] for name in (names or sorted(settings))}
+    return hashlib.sha1(json.dumps(items, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class Job:
+    """Progress and output of one background run; read it through snapshot()"""
+
+    def __init__(self, job_id, key, settings, backend):
+        self.id = job_id
+        self.key = key
+        self.settings = settings
+        self.backend = backend
+        self.status = QUEUED
+        # Discovered and never-seen-before links, counted as discovery runs
+        self.links = {'found': 0, 'new': 0}
+        self.cached = 0
+        self.results = []
+        self.qa_pairs = []
+        self.latest_pair = None
+        self.pdf_data = None
+        self.error = None
+        self.submitted = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def add_result(self, result, cached=False):
+        with self._lock:
+            self.results.append(result)
+            if cached:
+                self.cached += 1
+            if not result['error'] and not result['skipped']:
+                self.qa_pairs.extend(result['qa_pairs'])
+
+    def set_latest_pair(self, pair):
+        self.latest_pair = pair
+
+    def finish(self, status, error=None):
+        with self._lock:
+            self.status = status
+            self.error = error
+            self.finished = time.time()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            # Links are discovered as the job runs, so until it finishes the limit is the best total
+            total = self.links['found']
+            limit = self.settings['limit']
+            if limit is not None and (self.finished is None or total > limit):
+                total = limit
+            return {
+                'id': self.id,
+                'status': self.status,
+                'total': total,
+                'completed': len(self.results),
+                'cached': self.cached,
+                'resumed': sum(1 for result in self.results if result['resumed']),
+                'found_urls': self.links['found'],
+                'new_urls': self.links['new'],
+                'results': list(self.results),
+                'qa_pairs': list(self.qa_pairs),
+                'latest_pair': self.latest_pair,
+                'pdf_data': self.pdf_data,
+                'error': self.error,
+            }
+
+
+class JobManager:
+    """Runs pipeline jobs on background threads and caches per-article results"""
+
+    def __init__(self, max_workers=APP_JOB_WORKERS, cache_ttl=APP_CACHE_TTL, cache_size=APP_RESULT_CACHE_SIZE):
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pipeline-job')
+        self._jobs = {}
+        self._active = {}
+        self._results = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, base_url: str = ARTICLES_URL, full_archive: bool = False, limit: Optional[int] = None,
+               only_new: bool = False, include_interviews: bool = True, include_solo_articles: bool = True,
+               speaker_filter: Optional[List[str]] = None, parallel: bool = True,
+               batched: bool = False, stream: bool = False, backend: Optional[LLMBackend] = None) -> int:
+        """Start a job, or join an identical one that is queued or running; returns the job id
+
+        The job finds the article links itself, from the first index page
+        at base_url or the whole archive, and sends its LLM requests to
+        `backend` (default: built from config).
+        """
+        backend = backend or create_backend()
+        settings = {
+            'url': base_url,
+            'full_archive': full_archive,
+            'limit': limit,
+            'only_new': only_new,
+            'include_interviews': include_interviews,
+            'include_solo_articles': include_solo_articles,
+            'speaker_filter': None if speaker_filter is None else sorted(speaker_filter),
+            'parallel': parallel,
+            'batched': batched,
+            'stream': stream,
+            # The API key is left out: settings are stored with checkpoints
+            'backend': backend.name,
+            'model': backend.model,
+        }
+        # Only a hash of the endpoint and key goes into the job key
+        key = _settings_key(dict(settings, credentials=backend.fingerprint()))
+        with self._lock:
+            self._prune()
+            if key in self._active:
+                return self._active[key]
+            job = Job(next(self._ids), key, settings, backend)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+        self._executor.submit(self._run, job)
+        return job.id
+
+    def get(self, job_id) -> Optional[Dict]:
+        """Snapshot of a job's progress, or None once it has expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job is not None else None
+
+    def _prune(self):
+        """Forget finished jobs older than the cache TTL"""
+        cutoff = time.time() - self.cache_ttl
+        for job_id in [i for i, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+            del self._jobs[job_id]
+
+    def _cached_result(self, key):
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is None:
+                return None
+            stored, result = entry
+            if stored < time.time() - self.cache_ttl:
+                del self._results[key]
+                return None
+            self._results.move_to_end(key)
+            return result
+
+    def _store_result(self, key, result):
+        with self._lock:
+            self._results[key] = (time.time(), result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    def _uncached(self, job, urls: Iterable[str], result_key: str) -> Iterator[str]:
+        """URLs without a cached result; cached ones are added to the job as they go by"""
+        for url in urls:
+            cached = self._cached_result((url, result_key))
+            if cached is None:
+                yield url
+            else:
+                job.add_result(cached, cached=True)
+
+    def _run(self, job):
+        job.status = RUNNING
+        settings = job.settings
+        result_key = _settings_key(settings, _RESULT_SETTINGS)
+        registry = ArticleRegistry()
+        checkpoints = CheckpointStore()
+        try:
+            run = checkpoints.start_run(job.key, settings)
+            urls = register_urls(find_articles(settings['url'], settings['full_archive']), registry, job.links)
+
+            limit = settings['limit']
+            if not settings['only_new']:
+                # Serve articles finished by earlier jobs from the cache; change
+                # detection in only_new mode needs a fresh fetch instead
+                if limit is not None:
+                    urls = islice(urls, limit)
+                urls = self._uncached(job, urls, result_key)
+                limit = None
+
+            results = process_articles(
+                urls,
+                limit=limit,
+                registry=registry,
+                only_new=settings['only_new'],
+                keep=article_filter(settings['include_interviews'], settings['include_solo_articles']),
+                speaker_filter=speaker_predicate(settings['speaker_filter']),
+                llm_workers=LLM_MAX_WORKERS if settings['parallel'] else 1,
+                batched=settings['batched'],
+                stream=settings['stream'],
+                on_pair=job.set_latest_pair,
+                checkpoint=run,
+                backend=job.backend,
+            )
+            failed = False
+            for result in results:
+                if result['error']:
+                    failed = True
+                else:
+                    self._store_result((result['url'], result_key), result)
+                job.add_result(result)
+            if not job.links['found']:
+                raise RuntimeError(f"No articles found at {settings['url']}. Check your connection and try again.")
+            if not failed:
+                run.finish()
+
+            if job.qa_pairs:
+                job.pdf_data = create_pdf(job.qa_pairs, processes=PDF_RENDER_PROCESSES)
+            job.finish(DONE)
+        except Exception as e:
+            logger.error(f"Pipeline job {job.id} failed: {str(e)}")
+            job.finish(FAILED, str(e))
+        finally:
+            registry.close()
+            checkpoints.close()
+            with self._lock:
+                self._active.pop(job.key, None)
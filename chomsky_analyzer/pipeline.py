@@ -0,0 +1,274 @@
+"""Fetch -> parse -> Q&A pipeline shared by the Streamlit app and the batch CLI"""
+import traceback
+from collections import deque
+from itertools import chain, islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from scraper.content_fetcher import get_all_article_links, extract_articles
+from scraper.link_discovery import discover_article_links
+from scraper.article_parser import parse_dialogue
+from scraper.article_registry import DONE, FAILED
+from processing.qa_generator import create_qa_pairs
+from records import Paragraph, QAPair
+from config import SCRAPER_MAX_WORKERS, LLM_MAX_WORKERS
+
+ARTICLES_URL = "https://chomsky.info/articles/"
+
+# Speaker filter entries matching any speaker other than the named ones
+OTHER_SPEAKERS = "All other speakers"
+NAMED_SPEAKERS = ("Noam Chomsky", "Vijay Prashad")
+
+# Speakers whose turns never become Q&A pairs
+EXCLUDED_SPEAKERS = ("Interviewer",)
+
+
+def find_articles(base_url: str = ARTICLES_URL, full_archive: bool = False,
+                  max_workers: int = SCRAPER_MAX_WORKERS) -> Iterable[str]:
+    """Article URLs from the first index page, or a generator crawling the whole archive
+
+    The archive generator yields links as they are found, so handing it
+    straight to process_articles() starts fetching before discovery ends
+    and stops crawling once the article limit is reached.
+    """
+    if full_archive:
+        return discover_article_links(base_url, max_workers=max_workers)
+    return get_all_article_links(base_url)
+
+
+def register_urls(urls: Iterable[str], registry, counts: Dict[str, int]) -> Iterable[str]:
+    """Add URLs to the registry as they arrive, passing them through
+
+    counts['found'] and counts['new'] (URLs the registry had not seen)
+    are increased as the URLs are consumed. A list is registered at once
+    and returned as is, so order_urls() can still reorder it.
+    """
+    if isinstance(urls, list):
+        counts['found'] += len(urls)
+        counts['new'] += len(registry.add_urls(urls))
+        return urls
+    return _register_each(urls, registry, counts)
+
+
+def _register_each(urls, registry, counts):
+    for url in urls:
+        counts['found'] += 1
+        counts['new'] += len(registry.add_urls([url]))
+        yield url
+
+
+def order_urls(urls: Iterable[str], registry=None, only_new: bool = False) -> Iterable[str]:
+    """Unprocessed articles first when only_new is set, then finished ones that may have changed
+
+    Only lists are reordered; a generator of discovered URLs is passed
+    through in discovery order so fetching does not wait for discovery.
+    """
+    if not only_new or registry is None or not isinstance(urls, list):
+        return urls
+    pending = registry.pending_urls(urls)
+    pending_set = set(pending)
+    return pending + [url for url in urls if url not in pending_set]
+
+
+def article_filter(include_interviews: bool = True, include_solo_articles: bool = True) -> Callable[[set], bool]:
+    """Predicate over an article's speakers implementing the interview and solo filters"""
+
+    def keep(speakers):
+        if not speakers:
+            return True
+        if len(speakers) > 1 and not include_interviews:
+            return False
+        if len(speakers) == 1 and not include_solo_articles:
+            return False
+        return True
+
+    return keep
+
+
+def speaker_predicate(speaker_filter: Optional[Iterable[str]] = None,
+                      excluded: Iterable[str] = EXCLUDED_SPEAKERS) -> Callable[[str], bool]:
+    """Per-speaker predicate for create_qa_pairs built from the speaker multiselect
+
+    speaker_filter lists the speakers whose text is sent to the LLM, plus
+    OTHER_SPEAKERS for anyone not in NAMED_SPEAKERS; None keeps every
+    speaker. Speakers in `excluded` are always dropped.
+    """
+    wanted = None if speaker_filter is None else set(speaker_filter)
+    excluded = frozenset(excluded)
+
+    def keep(speaker):
+        if speaker in excluded:
+            return False
+        if wanted is None or speaker in wanted:
+            return True
+        return OTHER_SPEAKERS in wanted and speaker not in NAMED_SPEAKERS
+
+    return keep
+
+
+def process_articles(urls: Iterable[str], limit: Optional[int] = None, registry=None, only_new: bool = False,
+                     keep: Optional[Callable[[set], bool]] = None,
+                     speaker_filter: Optional[Callable[[str], bool]] = None,
+                     fetch_workers: int = SCRAPER_MAX_WORKERS, llm_workers: int = LLM_MAX_WORKERS,
+                     batched: bool = False, stream: bool = False,
+                     on_pair: Optional[Callable[[QAPair], None]] = None, checkpoint=None,
+                     backend=None) -> Iterator[Dict]:
+    """Fetch, parse and generate Q&A pairs for up to `limit` articles, yielding one result per article
+
+    `urls` may be a generator such as find_articles(full_archive=True);
+    it is consumed lazily, so articles are fetched while discovery is
+    still running and no more links are requested than the limit needs.
+    Articles are fetched concurrently and results arrive in completion
+    order. Each result has 'url', 'title', 'paragraphs' (count),
+    'speakers', 'qa_pairs', 'skipped' (rejected by `keep`, or no speaker
+    passes speaker_filter), 'resumed' (taken from the checkpoint), 'error'
+    and 'traceback'. speaker_filter is handed to create_qa_pairs, so only
+    wanted speakers' text reaches the LLM. With a registry, parse and Q&A
+    status are recorded per article and only_new skips articles whose
+    content is unchanged since a completed run. llm_workers > 1 sends
+    each speaker's requests concurrently. LLM requests go to `backend`
+    (an LLMBackend), or to the process-wide backend without one.
+
+    With a checkpoint (checkpoints.RunCheckpoint), finished articles are
+    yielded from it and articles parsed before an interruption go
+    straight to Q&A generation; neither is fetched again. New progress
+    is checkpointed as each article is parsed and finished.
+    """
+    urls = order_urls(urls, registry, only_new)
+    if limit is not None and not only_new:
+        # Without change detection nothing past the limit can be yielded
+        urls = islice(urls, limit)
+
+    options = dict(
+        registry=registry,
+        keep=keep,
+        speaker_filter=speaker_filter,
+        llm_workers=llm_workers,
+        batched=batched,
+        stream=stream,
+        on_pair=on_pair,
+        checkpoint=checkpoint,
+        backend=backend,
+    )
+    saved = checkpoint.load() if checkpoint is not None else {}
+    resumable = deque()
+
+    def fresh_urls():
+        # Checkpointed articles are set aside as their URLs arrive; only the rest are fetched.
+        # Failed articles are never checkpointed, so they are fetched again like unreached ones.
+        for url in urls:
+            if url in saved:
+                resumable.append(url)
+            else:
+                yield url
+
+    fetched = extract_articles(
+        fresh_urls(),
+        max_workers=fetch_workers,
+        registry=registry,
+        only_changed=only_new,
+        keep_tree=True,
+    )
+    count = 0
+    try:
+        # None marks the end of the fetches, after which the last checkpointed articles are yielded
+        for content in chain(fetched, [None]):
+            while resumable and (limit is None or count < limit):
+                count += 1
+                url = resumable.popleft()
+                yield _resume_article(url, saved[url], options)
+            if content is None or (limit is not None and count >= limit):
+                break
+            count += 1
+            yield process_article(content, **options)
+    finally:
+        # Stop any fetches still queued past the article limit
+        fetched.close()
+
+
+def _resume_article(url: str, state: Dict, options: Dict) -> Dict:
+    """Result of a checkpointed article, generating its Q&A pairs if it was only parsed"""
+    if state['result'] is not None:
+        return dict(state['result'], resumed=True)
+    # Parsed before the interruption; only the Q&A stage is left
+    return generate_article(_new_result(url, state['title']), state['paragraphs'], **options)
+
+
+def _new_result(url, title, error=None):
+    return {
+        'url': url,
+        'title': title,
+        'paragraphs': 0,
+        'speakers': set(),
+        'qa_pairs': [],
+        'skipped': False,
+        'resumed': False,
+        'error': error,
+        'traceback': None,
+    }
+
+
+def process_article(content: Dict, registry=None, checkpoint=None, **options) -> Dict:
+    """Parse one fetched article and generate its Q&A pairs; options go to generate_article()"""
+    url = content['url']
+    result = _new_result(url, content.get('title'), content.get('error'))
+    if result['error']:
+        if registry is not None:
+            registry.set_parse_status(url, FAILED)
+        return result
+
+    try:
+        # Hand the parsed content element straight to the parser
+        node = content.get('content_node')
+        paragraphs = parse_dialogue(node if node is not None else content['html_content'], url)
+        if registry is not None:
+            registry.set_parse_status(url, DONE)
+        if checkpoint is not None:
+            checkpoint.save_paragraphs(url, result['title'], paragraphs)
+    except Exception as e:
+        if registry is not None:
+            registry.set_parse_status(url, FAILED)
+        result['error'] = str(e)
+        result['traceback'] = traceback.format_exc()
+        return result
+
+    return generate_article(result, paragraphs, registry=registry, checkpoint=checkpoint, **options)
+
+
+def generate_article(result: Dict, paragraphs: List[Paragraph], registry=None, keep: Optional[Callable[[set], bool]] = None,
+                     speaker_filter: Optional[Callable[[str], bool]] = None,
+                     llm_workers: int = LLM_MAX_WORKERS, batched: bool = False, stream: bool = False,
+                     on_pair: Optional[Callable[[QAPair], None]] = None, checkpoint=None,
+                     backend=None) -> Dict:
+    """Filter an article's parsed paragraphs and generate its Q&A pairs into `result`"""
+    url = result['url']
+    try:
+        result['paragraphs'] = len(paragraphs)
+        result['speakers'] = set(p.speaker for p in paragraphs)
+        if keep is not None and not keep(result['speakers']):
+            result['skipped'] = True
+        elif speaker_filter is not None and not any(speaker_filter(s) for s in result['speakers']):
+            # Nobody left to ask about; don't touch the LLM
+            result['skipped'] = True
+        else:
+            result['qa_pairs'] = create_qa_pairs(
+                paragraphs,
+                concurrent=llm_workers > 1,
+                max_workers=llm_workers,
+                batched=batched,
+                stream=stream,
+                on_pair=on_pair,
+                speaker_filter=speaker_filter,
+                backend=backend,
+            )
+            if registry is not None:
+                registry.set_qa_status(url, DONE)
+        # Only finished articles are checkpointed; failed ones stay pending, so a resumed run retries them
+        if checkpoint is not None:
+            checkpoint.save_result(url, result)
+    except Exception as e:
+        if registry is not None:
+            registry.set_qa_status(url, FAILED)
+        result['error'] = str(e)
+        result['traceback'] = traceback.format_exc()
+
+    return result
@@ -0,0 +1,103 @@
+import re
+from collections import Counter, defaultdict
+from typing import FrozenSet
+
+# Words ignored when comparing questions and answers
+STOP_WORDS = frozenset({
+    "and", "or", "the", "a", "an", "in", "on", "at", "to", "for", "with", "by", "about",
+    "like", "as", "of", "do", "does", "how", "what", "when", "where", "why", "would", "could",
+    "should", "their", "they", "this", "that", "these", "those", "be", "been", "being", "is",
+    "am", "are", "was", "were", "has", "have", "had", "not", "from",
+})
+
+_WORD_PATTERN = re.compile(r'\b\w+\b')
+
+
+def significant_tokens(text: str) -> FrozenSet[str]:
+    """Lowercased words longer than three characters that are not stop words"""
+    return frozenset(
+        word.lower() for word in _WORD_PATTERN.findall(text)
+        if len(word) > 3 and word.lower() not in STOP_WORDS
+    )
+
+
+def jaccard(tokens1: FrozenSet[str], tokens2: FrozenSet[str]) -> float:
+    if not tokens1 or not tokens2:
+        return 0.0
+    intersection = len(tokens1 & tokens2)
+    return intersection / (len(tokens1) + len(tokens2) - intersection)
+
+
+class DedupIndex:
+    """Inverted index of token sets answering "is this a near-duplicate?" queries
+
+    Each text is tokenized once when added. A query only visits entries that
+    share at least one token with it, and skips those whose size rules out a
+    Jaccard similarity above the threshold, so results match a pairwise scan
+    with jaccard() exactly.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._sizes = []
+        self._postings = defaultdict(list)
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def add(self, text: str) -> FrozenSet[str]:
+        return self.add_tokens(significant_tokens(text))
+
+    def add_tokens(self, tokens: FrozenSet[str]) -> FrozenSet[str]:
+        entry_id = len(self._sizes)
+        self._sizes.append(len(tokens))
+        for token in tokens:
+            self._postings[token].append(entry_id)
+        return tokens
+
+    def is_duplicate(self, text: str) -> bool:
+        return self.is_duplicate_tokens(significant_tokens(text))
+
+    def is_duplicate_tokens(self, tokens: FrozenSet[str]) -> bool:
+        """True if any indexed entry has Jaccard similarity above the threshold"""
+        if not tokens:
+            return False
+
+        size = len(tokens)
+        # J(A, B) <= min(|A|, |B|) / max(|A|, |B|), so sizes outside this band can't match
+        min_size = self.threshold * size
+        max_size = size / self.threshold if self.threshold > 0 else float('inf')
+
+        overlaps = Counter()
+        for token in tokens:
+            overlaps.update(self._postings.get(token, ()))
+
+        for entry_id, intersection in overlaps.items():
+            other_size = self._sizes[entry_id]
+            if other_size < min_size or other_size > max_size:
+                continue
+            if intersection / (size + other_size - intersection) > self.threshold:
+                return True
+        return False
+
+
+class QADeduplicator:
+    """Question and answer indexes used to accept or reject generated Q&A pairs"""
+
+    def __init__(self, question_threshold: float, answer_threshold: float):
+        self.questions = DedupIndex(question_threshold)
+        self.answers = DedupIndex(answer_threshold)
+
+    def accept(self, pair, check_answer: bool = False) -> bool:
+        """Index and accept `pair` unless it near-duplicates an accepted question (or answer)"""
+        question_tokens = significant_tokens(pair.question)
+        if self.questions.is_duplicate_tokens(question_tokens):
+            return False
+
+        answer_tokens = significant_tokens(pair.answer)
+        if check_answer and self.answers.is_duplicate_tokens(answer_tokens):
+            return False
+
+        self.questions.add_tokens(question_tokens)
+        self.answers.add_tokens(answer_tokens)
+        return True
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+
+from config import (
+    LLM_BACKEND,
+    LLM_API_URL,
+    LLM_MODEL,
+    LLM_API_KEY,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+    MOCK_LLM_PORT,
+)
+from processing.llm_client import get_llm_client
+
+# Known OpenAI-compatible providers; api_key_env names the variable holding each provider's key.
+# Rate budgets are per minute, None meaning unlimited: Groq's free tier, OpenRouter's free-model
+# request limit, and none for the local mock server.
+BACKEND_PRESETS = {
+    'groq': {
+        'api_url': "https://api.groq.com/openai/v1/chat/completions",
+        'model': "llama3-70b-8192",
+        'api_key_env': 'GROQ_API_KEY',
+        'requests_per_minute': 30,
+        'tokens_per_minute': 6000,
+    },
+    'openrouter': {
+        'api_url': "https://openrouter.ai/api/v1/chat/completions",
+        'model': "meta-llama/llama-3-70b-instruct",
+        'api_key_env': 'OPENROUTER_API_KEY',
+        'extra_headers': {"X-Title": "Chomsky Archive Analyzer"},
+        'requests_per_minute': 20,
+        'tokens_per_minute': None,
+    },
+    'mock': {
+        'api_url': f"http://127.0.0.1:{MOCK_LLM_PORT}/v1/chat/completions",
+        'model': "mock-llm",
+        'api_key_env': None,
+        'requests_per_minute': None,
+        'tokens_per_minute': None,
+    },
+}
+
+
+class LLMBackend:
+    """An OpenAI-compatible chat-completions endpoint: where requests go, which model, how they authenticate and how fast they may be sent."""
+
+    def __init__(self, name, api_url, model, api_key='', extra_headers=None,
+                 requests_per_minute=None, tokens_per_minute=None):
+        self.name = name
+        self.api_url = api_url
+        self.model = model
+        self.api_key = api_key
+        self.extra_headers = dict(extra_headers or {})
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+    def headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        headers.update(self.extra_headers)
+        return headers
+
+    def payload(self, prompt, **params):
+        """Request body for a single user prompt; parameters set to None are left out."""
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+        }
+        payload.update((key, value) for key, value in params.items() if value is not None)
+        return payload
+
+    def fingerprint(self):
+        """Short hash of the endpoint and API key, to tell credentials apart without storing the key."""
+        return hashlib.sha256(f"{self.api_url}\n{self.api_key}".encode('utf-8')).hexdigest()[:16]
+
+    def client(self):
+        """The rate-limited LLMClient shared by every caller of this endpoint and budget."""
+        return get_llm_client(self.api_url, self.requests_per_minute, self.tokens_per_minute)
+
+    def __repr__(self):
+        return f"LLMBackend({self.name!r}, {self.api_url!r}, model={self.model!r})"
+
+
+def create_backend(name=None, api_url=None, model=None, api_key=None):
+    """Build a backend from a preset, then config/env overrides, then explicit arguments."""
+    name = name or LLM_BACKEND
+    if name not in BACKEND_PRESETS:
+        raise ValueError(f"Unknown LLM backend {name!r}; choose one of {', '.join(BACKEND_PRESETS)}")
+    preset = BACKEND_PRESETS[name]
+
+    key_env = preset.get('api_key_env')
+    preset_key = os.environ.get(key_env, '') if key_env else ''
+    return LLMBackend(
+        name,
+        api_url or LLM_API_URL or preset['api_url'],
+        model or LLM_MODEL or preset['model'],
+        api_key or LLM_API_KEY or preset_key,
+        preset.get('extra_headers'),
+        LLM_REQUESTS_PER_MINUTE if LLM_REQUESTS_PER_MINUTE is not None else preset.get('requests_per_minute'),
+        LLM_TOKENS_PER_MINUTE if LLM_TOKENS_PER_MINUTE is not None else preset.get('tokens_per_minute'),
+    )
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the process-wide backend, built from config on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend()
+        return _backend
+
+
+def configure_backend(name=None, api_url=None, model=None, api_key=None):
+    """Replace the process-wide backend, e.g. to point the pipeline at the mock server."""
+    global _backend
+    with _backend_lock:
+        _backend = create_backend(name, api_url, model, api_key)
+        return _backend
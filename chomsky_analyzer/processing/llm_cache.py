@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from config import LLM_CACHE_PATH, LLM_CACHE_MAX_BYTES, LLM_CACHE_BYPASS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_completions_accessed_at ON completions (accessed_at);
+"""
+
+
+def cache_key(model, prompt, temperature=None, top_p=None, max_tokens=None):
+    """Content address of a completion request."""
+    material = json.dumps(
+        [model, prompt, temperature, top_p, max_tokens],
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """Persistent completion cache keyed on a hash of the request parameters.
+
+    With bypass set, lookups always miss but fresh responses are still
+    stored, which refreshes the cache.
+    """
+
+    def __init__(self, db_path=LLM_CACHE_PATH, max_bytes=LLM_CACHE_MAX_BYTES, bypass=LLM_CACHE_BYPASS):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM completions"
+            ).fetchone()[0]
+
+    def get(self, key):
+        """Return the cached response text for `key`, or None."""
+        if self.bypass:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response FROM completions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE completions SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            return row[0]
+
+    def put(self, key, response):
+        size = len(response.encode('utf-8'))
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT size FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._total_bytes -= row[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._total_bytes += size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used completions until the cache fits in max_bytes."""
+        rows = self._conn.execute(
+            "SELECT key, size FROM completions ORDER BY accessed_at"
+        ).fetchall()
+        for key, size in rows:
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM completions WHERE key = ?", (key,))
+            self._total_bytes -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes': self._total_bytes,
+                'bypass': self.bypass,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Return the process-wide LLMCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+def configure_llm_cache(db_path=LLM_CACHE_PATH, max_bytes=LLM_CACHE_MAX_BYTES, bypass=LLM_CACHE_BYPASS):
+    """Replace the process-wide cache, e.g. to move it or to bypass lookups."""
+    global _cache
+    with _cache_lock:
+        _cache = LLMCache(db_path, max_bytes, bypass)
+        return _cache
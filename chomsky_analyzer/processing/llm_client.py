@@ -0,0 +1,264 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+import requests
+
+import http_client
+from http_client import RETRY_STATUSES
+from processing.tokenizer import get_tokenizer
+from config import (
+    LLM_TIMEOUT,
+    LLM_MAX_ATTEMPTS,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_MAX_RETRY_AFTER,
+)
+
+logger = logging.getLogger(__name__)
+
+# Budgets are enforced over a sliding one-minute window
+WINDOW_SECONDS = 60.0
+
+# Groq reports reset times as durations such as "7.66s", "2m59.56s" or "120ms"
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+
+
+class LLMRequestError(Exception):
+    """A chat completion that failed after its retries, as opposed to an answer that could not be parsed."""
+
+
+def parse_duration(value):
+    """Seconds represented by a rate-limit reset header, or None if unparseable."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def estimate_tokens(payload):
+    """Token cost of a request: the counted prompt tokens plus the completion budget."""
+    tokenizer = get_tokenizer()
+    prompt_tokens = sum(tokenizer.count(message.get('content', '')) for message in payload.get('messages', []))
+    return prompt_tokens + payload.get('max_tokens', 0)
+
+
+class LLMClient:
+    """Chat-completion client that schedules calls under RPM and TPM budgets.
+
+    Callers block until the request fits in both budgets instead of being
+    rejected. 429s and transient 5xx responses are re-queued, with the
+    wait taken from Retry-After or the provider's x-ratelimit-reset-*
+    headers, so throttling delays work rather than dropping it. A budget
+    of None is unlimited.
+    """
+
+    def __init__(self, api_url, requests_per_minute=None, tokens_per_minute=None,
+                 max_attempts=LLM_MAX_ATTEMPTS, timeout=LLM_TIMEOUT):
+        self.api_url = api_url
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self._window = deque()  # [timestamp, tokens] per request in the last minute
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def _reserve(self, tokens, cancel=None):
+        """Block until a request costing `tokens` fits in the budgets; returns its window entry.
+
+        Returns None instead, without using any budget, once the `cancel`
+        event is set.
+        """
+        # A single oversized request must still be allowed through on its own
+        if self.tokens_per_minute is not None:
+            tokens = min(tokens, self.tokens_per_minute)
+        while True:
+            with self._lock:
+                if cancel is not None and cancel.is_set():
+                    return None
+                now = time.monotonic()
+                while self._window and now - self._window[0][0] >= WINDOW_SECONDS:
+                    self._window.popleft()
+
+                used = sum(entry[1] for entry in self._window)
+                wait = self._blocked_until - now
+                over_requests = self.requests_per_minute is not None and len(self._window) >= self.requests_per_minute
+                over_tokens = self.tokens_per_minute is not None and used + tokens > self.tokens_per_minute
+                if over_requests or over_tokens:
+                    wait = max(wait, self._window[0][0] + WINDOW_SECONDS - now)
+
+                if wait <= 0:
+                    entry = [now, tokens]
+                    self._window.append(entry)
+                    return entry
+            if cancel is None:
+                time.sleep(min(wait, WINDOW_SECONDS))
+            else:
+                cancel.wait(min(wait, WINDOW_SECONDS))
+
+    def _block_for(self, seconds):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _apply_headers(self, headers):
+        """Pause scheduling when the provider reports an exhausted budget."""
+        for kind in ('requests', 'tokens'):
+            remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+            reset = parse_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+            if remaining is not None and reset is not None:
+                try:
+                    exhausted = int(float(remaining)) <= 0
+                except ValueError:
+                    continue
+                if exhausted:
+                    self._block_for(min(reset, HTTP_MAX_RETRY_AFTER))
+
+    def _throttle_delay(self, response, attempt):
+        headers = response.headers
+        delay = parse_duration(headers.get('Retry-After'))
+        if delay is None:
+            resets = [parse_duration(headers.get(f'x-ratelimit-reset-{kind}')) for kind in ('requests', 'tokens')]
+            resets = [reset for reset in resets if reset is not None]
+            delay = max(resets) if resets else None
+        if delay is None:
+            delay = HTTP_BACKOFF_FACTOR * (2 ** attempt)
+        return min(delay, HTTP_MAX_RETRY_AFTER)
+
+    def _send(self, payload, headers, cancel=None, **kwargs):
+        """POST with budget waits and re-queues; returns the final response and its window entry.
+
+        Both are None if `cancel` is set before the request is sent.
+        """
+        estimate = estimate_tokens(payload)
+        response = None
+        entry = None
+        for attempt in range(self.max_attempts):
+            entry = self._reserve(estimate, cancel)
+            if entry is None:
+                return None, None
+            try:
+                response = http_client.post(
+                    self.api_url, headers=headers, json=payload,
+                    timeout=self.timeout, max_retries=0, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_attempts - 1:
+                    raise
+                time.sleep(HTTP_BACKOFF_FACTOR * (2 ** attempt))
+                continue
+
+            self._apply_headers(response.headers)
+
+            if response.status_code in RETRY_STATUSES:
+                delay = self._throttle_delay(response, attempt)
+                if response.status_code == 429:
+                    self.throttled += 1
+                    logger.info(f"Rate limited by LLM provider, retrying in {delay:.1f}s")
+                self._block_for(delay)
+                if attempt < self.max_attempts - 1:
+                    # Hand the connection back to the pool; a streamed response would otherwise hold it
+                    response.close()
+                    continue
+            return response, entry
+        return response, entry
+
+    def _charge(self, entry, usage):
+        """Replace a request's estimated token cost with the usage the provider reports."""
+        if usage and usage.get('total_tokens'):
+            with self._lock:
+                entry[1] = usage['total_tokens']
+
+    def post(self, payload, headers, cancel=None, **kwargs):
+        """POST a chat completion, waiting for budget and re-queueing throttled calls.
+
+        Returns None without sending if the `cancel` event is set while
+        the call waits for budget.
+        """
+        response, entry = self._send(payload, headers, cancel=cancel, **kwargs)
+        if response is not None and response.status_code == 200:
+            try:
+                self._charge(entry, response.json().get('usage'))
+            except ValueError:
+                pass
+        return response
+
+    def stream(self, payload, headers, cancel=None):
+        """Yield completion text as the provider streams it (server-sent events).
+
+        Scheduling and re-queueing work as in post(). Closing the generator
+        early closes the connection, which stops the provider generating
+        tokens nobody will read. Raises ConnectionError if the stream ends
+        before the completion is finished, and LLMRequestError if the
+        provider rejects the request. Nothing is sent or yielded if the
+        `cancel` event is set first.
+        """
+        response, entry = self._send(dict(payload, stream=True), headers, cancel=cancel, stream=True)
+        if response is None:
+            return
+        if response.status_code != 200:
+            logger.warning(f"API Error ({response.status_code}): {response.text}")
+            response.close()
+            raise LLMRequestError(f"API Error ({response.status_code})")
+
+        finished = False
+        try:
+            for line in response.iter_lines():
+                line = line.decode('utf-8')
+                if not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    finished = True
+                    break
+
+                chunk = json.loads(data)
+                # Groq reports usage on the last chunk under x_groq
+                self._charge(entry, chunk.get('usage') or (chunk.get('x_groq') or {}).get('usage'))
+                choices = chunk.get('choices') or []
+                if not choices:
+                    continue
+                text = (choices[0].get('delta') or {}).get('content')
+                if text:
+                    yield text
+                if choices[0].get('finish_reason'):
+                    finished = True
+        finally:
+            response.close()
+
+        if not finished:
+            raise requests.ConnectionError("LLM stream ended before the completion finished")
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            recent = [entry for entry in self._window if now - entry[0] < WINDOW_SECONDS]
+            return {
+                'requests_last_minute': len(recent),
+                'tokens_last_minute': sum(entry[1] for entry in recent),
+                'throttled': self.throttled,
+            }
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_llm_client(api_url, requests_per_minute=None, tokens_per_minute=None):
+    """Return the process-wide LLMClient for an endpoint and budgets, so budgets are shared across threads."""
+    key = (api_url, requests_per_minute, tokens_per_minute)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = LLMClient(api_url, requests_per_minute, tokens_per_minute)
+        return _clients[key]
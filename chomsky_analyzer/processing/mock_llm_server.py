@@ -0,0 +1,277 @@
+"""Local OpenAI-compatible chat-completions stub for offline benchmarks and load tests
+
+Run it from the chomsky_analyzer directory and point the pipeline at it:
+
+    python -m processing.mock_llm_server --latency 0.5 --error-rate 0.05
+    CHOMSKY_LLM_BACKEND=mock streamlit run app.py
+
+Completions come from --responses (a JSON list of strings, served in
+rotation) or are generated to match the prompt: one Q&A pair per theme,
+two per segment, or the number of pairs the prompt asks for. GET /stats
+reports request counts and the peak number of requests in flight.
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import MOCK_LLM_PORT
+
+_WORDS = (
+    "power propaganda consent media language grammar empire state labor market "
+    "democracy war policy elite doctrine history freedom control public institutions"
+).split()
+
+
+class MockLLMState:
+    """Behavior settings and counters shared by all request handlers"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=429, retry_after=1,
+                 chunk_delay=0.0, responses=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.chunk_delay = chunk_delay
+        self.responses = list(responses or [])
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._serial = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def begin(self):
+        """Count a request; returns (serial number, whether to fail it, latency)"""
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            latency = max(self.latency + self.random.uniform(-self.jitter, self.jitter), 0.0)
+            return next(self._serial), fail, latency
+
+    def end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def completion(self, serial, prompt):
+        if self.responses:
+            return self.responses[(serial - 1) % len(self.responses)]
+        return generate_completion(prompt, serial)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+            }
+
+
+def _pair(serial, index):
+    """A Q&A pair whose wording is unique to (serial, index), so dedup keeps it"""
+    rng = random.Random(serial * 1000 + index)
+    tag = f"item{serial}x{index}"
+    topic = " ".join(rng.sample(_WORDS, 3))
+    return (
+        f"Q: How do {tag}a, {tag}b and {topic} relate in this text?\n"
+        f"A: The text ties {tag}c to {topic}. "
+        + " ".join(f"It connects {word} to {rng.choice(_WORDS)}." for word in rng.sample(_WORDS, 4))
+    )
+
+
+def generate_completion(prompt, serial=1):
+    """Canned completion in the format the prompt asks for"""
+    themes = re.findall(r'^THEME (\d+):', prompt, re.MULTILINE)
+    if themes:
+        return "\n\n".join(f"### THEME {n}\n{_pair(serial, int(n))}" for n in themes)
+
+    segments = re.findall(r'^SEGMENT (\d+):', prompt, re.MULTILINE)
+    if segments:
+        return "\n\n".join(
+            f"### SEGMENT {n}\n{_pair(serial, int(n) * 10)}\n\n{_pair(serial, int(n) * 10 + 1)}"
+            for n in segments
+        )
+
+    match = re.search(r'generate (?:EXACTLY )?(\d+)', prompt, re.IGNORECASE)
+    count = int(match.group(1)) if match else 1
+    return "\n\n".join(_pair(serial, index) for index in range(count))
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/stats':
+            self._send_json(200, self.state.stats())
+        else:
+            self._send_json(404, {'error': {'message': 'not found'}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'invalid JSON'}})
+            return
+
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found'}})
+            return
+
+        serial, fail, latency = self.state.begin()
+        try:
+            time.sleep(latency)
+            if fail:
+                self._send_json(
+                    self.state.error_status,
+                    {'error': {'message': 'injected failure'}},
+                    {'Retry-After': str(self.state.retry_after)},
+                )
+                return
+
+            messages = request.get('messages') or [{}]
+            prompt = messages[-1].get('content', '')
+            text = self.state.completion(serial, prompt)
+            usage = {
+                'prompt_tokens': len(prompt) // 4,
+                'completion_tokens': len(text) // 4,
+                'total_tokens': (len(prompt) + len(text)) // 4,
+            }
+            if request.get('stream'):
+                self._stream(serial, request, text, usage)
+            else:
+                self._send_json(200, {
+                    'id': f'mock-{serial}',
+                    'object': 'chat.completion',
+                    'model': request.get('model'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': text},
+                        'finish_reason': 'stop',
+                    }],
+                    'usage': usage,
+                })
+        finally:
+            self.state.end()
+
+    def _stream(self, serial, request, text, usage):
+        """Send the completion as server-sent events, one word per chunk"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def event(choice, extra=None):
+            chunk = {
+                'id': f'mock-{serial}',
+                'object': 'chat.completion.chunk',
+                'model': request.get('model'),
+                'choices': [choice],
+            }
+            chunk.update(extra or {})
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            for piece in re.findall(r'\S*\s*', text):
+                if not piece:
+                    continue
+                event({'index': 0, 'delta': {'content': piece}, 'finish_reason': None})
+                if self.state.chunk_delay:
+                    time.sleep(self.state.chunk_delay)
+            event({'index': 0, 'delta': {}, 'finish_reason': 'stop'}, {'x_groq': {'usage': usage}})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, as streaming callers do once they have enough pairs
+            pass
+
+
+def start_mock_server(port=MOCK_LLM_PORT, host='127.0.0.1', **options):
+    """Serve the mock API from a background thread; returns the server (server.state holds the counters)
+
+    Pass port=0 to pick a free port (server.server_address[1]). Call
+    server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), MockLLMHandler)
+    server.daemon_threads = True
+    server.state = MockLLMState(**options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat-completions stub")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=MOCK_LLM_PORT)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before each response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random +/- seconds added to the latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument('--error-status', type=int, default=429, help="Status code of injected failures")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds on injected failures")
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument('--responses', help="JSON file with a list of completion strings to serve in rotation")
+    parser.add_argument('--seed', type=int, help="Seed for latency jitter and error injection")
+    args = parser.parse_args()
+
+    responses = None
+    if args.responses:
+        with open(args.responses, encoding='utf-8') as f:
+            responses = json.load(f)
+
+    state = MockLLMState(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        chunk_delay=args.chunk_delay,
+        responses=responses,
+        seed=args.seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), MockLLMHandler)
+    server.daemon_threads = True
+    server.state = state
+    print(f"Mock LLM API listening on http://{args.host}:{args.port}/v1/chat/completions")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served {json.dumps(state.stats())}")
+
+
+if __name__ == "__main__":
+    main()
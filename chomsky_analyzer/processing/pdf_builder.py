@@ -1,27 +1,187 @@
 from fpdf import FPDF
-from typing import List, Dict
+import fpdf.fpdf
+from typing import BinaryIO, Iterable, List, Optional, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain, groupby
+from operator import attrgetter
+import io
+import logging
+import os
 import textwrap
+import threading
 import re
+import unicodedata
+import zlib
+
+from config import PDF_UNICODE_FONT_DIR, PDF_UNICODE_FONTS
+from records import QAPair, group_by_article, qa_pairs_from_dicts
+
+logger = logging.getLogger(__name__)
+
+# Left in the page content by ChapterPDFGenerator where the page number goes
+FOOTER_PLACEHOLDER = '% page number'
+
+# Font styles in the order the layout first uses them; registering them up front gives
+# every generator the same /F numbers, so pages rendered separately can be merged
+FONT_STYLES = ('B', 'I', 'BI', '')
+
+# Chapters are runs of records sharing an Article
+_ARTICLE = attrgetter('article')
+
+# Typographic punctuation spelled out in ASCII for the built-in fonts
+_ASCII_PUNCTUATION = {
+    '\u2010': '-', '\u2011': '-', '\u2012': '-', '\u2013': '-', '\u2014': '-', '\u2015': '-', '\u2212': '-',
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u201b': "'", '\u2032': "'",
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u201f': '"', '\u2033': '"',
+    '\u2026': '...', '\u2022': '*',
+    '\u2002': ' ', '\u2003': ' ', '\u2009': ' ', '\u200a': ' ', '\u202f': ' ',
+    '\u200b': None, '\ufeff': None,
+}
+
+def _latin1(code):
+    return code < 0x80 or 0xA0 <= code <= 0xFF
+
+class _Latin1Table(dict):
+    """str.translate() table reducing text to what the built-in fonts can encode
+    
+    Each character's entry is worked out the first time it is seen and
+    then kept. Latin-1 characters stay (accented names survive),
+    typographic punctuation becomes ASCII, other letters lose their
+    accents via NFKD and anything left over is dropped.
+    """
+    
+    def __init__(self):
+        super().__init__((ord(char), value) for char, value in _ASCII_PUNCTUATION.items())
+    
+    def __missing__(self, code):
+        if _latin1(code):
+            value = code
+        else:
+            value = ''.join(
+                char for char in unicodedata.normalize('NFKD', chr(code)) if _latin1(ord(char))
+            ) or None
+        self[code] = value
+        return value
+
+_LATIN1_TABLE = _Latin1Table()
+
+# Runs of characters the built-in fonts cannot encode; only these are looked up in the table
+_NON_LATIN1 = re.compile('[^\x00-\x7f\xa0-\xff]+')
+
+def _to_latin1(match):
+    return match.group().translate(_LATIN1_TABLE)
+
+@lru_cache(maxsize=None)
+def unicode_font_files():
+    """Configured TTF files by style, or {} when the regular face is not available"""
+    if not PDF_UNICODE_FONT_DIR:
+        return {}
+    regular = os.path.join(PDF_UNICODE_FONT_DIR, PDF_UNICODE_FONTS.get('', ''))
+    if not os.path.isfile(regular):
+        logger.warning(f"Unicode font not found at {regular}, using built-in fonts")
+        return {}
+    
+    files = {}
+    for style in FONT_STYLES:
+        path = os.path.join(PDF_UNICODE_FONT_DIR, PDF_UNICODE_FONTS.get(style) or '')
+        files[style] = path if os.path.isfile(path) else regular
+    return files
+
+class _GlyphSubset(list):
+    """Code points drawn with a TTF font; FPDF appends one per character, this keeps each once"""
+    
+    def __init__(self, codes=()):
+        super().__init__()
+        self._seen = set()
+        self.extend(codes)
+    
+    def append(self, code):
+        if code not in self._seen:
+            self._seen.add(code)
+            super().append(code)
+    
+    def extend(self, codes):
+        for code in codes:
+            self.append(code)
+
+# Parsed TTF metrics by file, shared by every generator in the process
+_ttf_cache = {}
+_ttf_cache_lock = threading.Lock()
 
 class PDFGenerator(FPDF):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.unicode_fonts = unicode_font_files()
+        self.font_name = 'Unicode' if self.unicode_fonts else 'Arial'
+        self.register_fonts()
+    
+    def register_fonts(self):
+        """Load every style in FONT_STYLES before the first page without selecting any of them"""
+        for style in FONT_STYLES:
+            if self.unicode_fonts:
+                self._add_unicode_font(style, self.unicode_fonts[style])
+            else:
+                self.set_font(self.font_name, style)
+        self.font_family = ''
+        self.font_style = ''
+        self.font_size_pt = 12
+    
+    def _add_unicode_font(self, style, path):
+        fontkey = self.font_name.lower() + style
+        with _ttf_cache_lock:
+            cached = _ttf_cache.get(path)
+            if cached is None:
+                # Skip FPDF's own .pkl files next to the font; the metrics are cached here instead
+                cache_mode = fpdf.fpdf.FPDF_CACHE_MODE
+                fpdf.fpdf.FPDF_CACHE_MODE = 1
+                try:
+                    self.add_font(self.font_name, style, path, uni=True)
+                finally:
+                    fpdf.fpdf.FPDF_CACHE_MODE = cache_mode
+                cached = dict(self.fonts[fontkey])
+                _ttf_cache[path] = cached
+            else:
+                self.fonts[fontkey] = dict(cached, i=len(self.fonts) + 1, fontkey=fontkey)
+                self.font_files[fontkey] = {
+                    'length1': os.path.getsize(path), 'type': 'TTF', 'ttffile': path
+                }
+                self.font_files[path] = {'type': 'TTF'}
+        self.fonts[fontkey]['subset'] = _GlyphSubset(range(32))
+    
+    def glyph_subsets(self):
+        """Code points used so far per TTF font, for merging into another generator"""
+        return {key: list(font['subset']) for key, font in self.fonts.items() if font.get('type') == 'TTF'}
+    
+    def add_glyph_subsets(self, subsets):
+        for key, codes in subsets.items():
+            self.fonts[key]['subset'].extend(codes)
+    
     def header(self):
-        self.set_font('Arial', 'B', 12)
+        self.set_font(self.font_name, 'B', 12)
         self.set_text_color(0, 0, 0)
         self.cell(0, 10, 'Chomsky Archive Analysis', 0, 1, 'C')
         self.line(10, 20, 200, 20)
         self.ln(10)
     
     def footer(self):
+        self._footer_style()
+        self.cell(0, 10, self.footer_text(self.page_no()), 0, 0, 'C')
+    
+    def _footer_style(self):
         self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
+        self.set_font(self.font_name, 'I', 8)
         self.set_text_color(128, 128, 128)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+    
+    def footer_text(self, page_no):
+        return f'Page {page_no}'
     
     def chapter_title(self, title, date, url):
-        self.set_font('Arial', 'B', 14)
+        self.set_font(self.font_name, 'B', 14)
         self.set_text_color(0, 0, 128)  # Dark blue
         self.cell(0, 10, self.clean_text(title), 0, 1)
-        self.set_font('Arial', 'I', 10)
+        self.set_font(self.font_name, 'I', 10)
         self.set_text_color(128, 128, 128)  # Gray
         self.cell(0, 5, f'Date: {self.clean_text(date)}', 0, 1)
         self.cell(0, 5, f'Source: {self.clean_text(url)}', 0, 1)
@@ -30,27 +190,16 @@ class PDFGenerator(FPDF):
         self.ln(10)
     
     def clean_text(self, text):
-        """Clean text to handle problematic characters"""
+        """Reduce text to what the current fonts can show, in one pass"""
         if not text:
             return ""
-        
-        # Replace problematic characters
-        text = text.replace('—', '-')  # Replace em dash with hyphen
-        text = text.replace('–', '-')  # Replace en dash with hyphen
-        text = text.replace(''', "'")  # Replace smart quotes
-        text = text.replace(''', "'")
-        text = text.replace('"', '"')
-        text = text.replace('"', '"')
-        text = text.replace('…', '...')  # Replace ellipsis
-        
-        # Remove any other non-ASCII characters to be safe
-        text = re.sub(r'[^\x00-\x7F]+', '', text)
-        
-        return text
+        if self.unicode_fonts or text.isascii():
+            return text
+        return _NON_LATIN1.sub(_to_latin1, text)
     
     def qa_block(self, q, a, speaker):
         # Question formatting
-        self.set_font('Arial', 'BI', 12)
+        self.set_font(self.font_name, 'BI', 12)
         self.set_text_color(0, 0, 0)
         
         # Format question with proper text wrapping - ensure no truncation
@@ -60,12 +209,12 @@ class PDFGenerator(FPDF):
         self.ln(3)
         
         # Speaker label
-        self.set_font('Arial', 'B', 11)
+        self.set_font(self.font_name, 'B', 11)
         self.set_text_color(0, 102, 204)  # Blue
-        self.cell(0, 6, f"{speaker}:", 0, 1)
+        self.cell(0, 6, f"{self.clean_text(speaker)}:", 0, 1)
         
         # Answer formatting
-        self.set_font('Arial', '', 11)
+        self.set_font(self.font_name, '', 11)
         self.set_text_color(0, 0, 0)
         
         # Format answer with proper text wrapping - ensure no truncation
@@ -104,32 +253,284 @@ class PDFGenerator(FPDF):
         self.dashed_line(20, self.get_y(), 190, self.get_y(), 1, 1)
         self.ln(10)
 
-def create_pdf(data: List[Dict], filename: str):
-    pdf = PDFGenerator()
+class StreamingPDFGenerator(PDFGenerator):
+    """PDFGenerator that writes every page to a binary stream as soon as it is finished
+
+    Pages get the object numbers FPDF would give them (two per page, from
+    3 upwards), so only the fonts, resources, page tree and xref table are
+    written at the end. Memory stays at about one page whatever the
+    document length. Built on PyFPDF 1.7 internals; internal links and
+    the {nb} page-count alias are not supported.
+    """
+    
+    def __init__(self, stream, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stream = stream
+        self._written = 0
+    
+    def _offset(self):
+        return self._written + len(self.buffer)
+    
+    def _flush(self):
+        if self.buffer:
+            data = self.buffer.encode('latin-1')
+            self._stream.write(data)
+            self._written += len(data)
+            self.buffer = ''
+    
+    def _page_size(self):
+        if self.def_orientation == 'P':
+            return self.fw_pt, self.fh_pt
+        return self.fh_pt, self.fw_pt
+    
+    def _newobj(self):
+        self.n += 1
+        self.offsets[self.n] = self._offset()
+        self._out(f'{self.n} 0 obj')
+    
+    def _beginpage(self, orientation):
+        if self.page == 0:
+            self._putheader()
+        super()._beginpage(orientation)
+    
+    def adopt_page(self, content):
+        """Append a page rendered by another generator that registered the same fonts"""
+        if self.page == 0:
+            self._putheader()
+        self.page += 1
+        self.pages[self.page] = content
+        self._putpage(self.page)
+        del self.pages[self.page]
+        self._flush()
+    
+    def finish(self):
+        """Write the trailer of a document built from adopted pages (close() would add a footer)"""
+        if self.state < 3:
+            self._enddoc()
+    
+    def _endpage(self):
+        super()._endpage()
+        self._putpage(self.page)
+        del self.pages[self.page]
+        self._flush()
+    
+    def _putpage(self, n):
+        """Write page n and its content stream, as FPDF._putpages does for each page"""
+        w_pt, h_pt = self._page_size()
+        self._newobj()
+        self._out('<</Type /Page')
+        self._out('/Parent 1 0 R')
+        if n in self.orientation_changes:
+            self._out('/MediaBox [0 0 %.2f %.2f]' % (h_pt, w_pt))
+        self._out('/Resources 2 0 R')
+        if self.pdf_version > '1.3':
+            self._out('/Group <</Type /Group /S /Transparency /CS /DeviceRGB>>')
+        self._out(f'/Contents {self.n + 1} 0 R>>')
+        self._out('endobj')
+        
+        content = self.pages[n].encode('latin-1')
+        stream_filter = ''
+        if self.compress:
+            content = zlib.compress(content)
+            stream_filter = '/Filter /FlateDecode '
+        self._newobj()
+        self._out(f'<<{stream_filter}/Length {len(content)}>>')
+        self._putstream(content)
+        self._out('endobj')
+    
+    def _putpages(self):
+        # Pages are already out; only the page tree root remains
+        nb = self.page
+        w_pt, h_pt = self._page_size()
+        self.offsets[1] = self._offset()
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ''.join(f'{3 + 2 * i} 0 R ' for i in range(nb)) + ']')
+        self._out(f'/Count {nb}')
+        self._out('/MediaBox [0 0 %.2f %.2f]' % (w_pt, h_pt))
+        self._out('>>')
+        self._out('endobj')
+    
+    def _putresources(self):
+        self._putfonts()
+        self._putimages()
+        self.offsets[2] = self._offset()
+        self._out('2 0 obj')
+        self._out('<<')
+        self._putresourcedict()
+        self._out('>>')
+        self._out('endobj')
+    
+    def _enddoc(self):
+        self._putpages()
+        self._putresources()
+        # Info
+        self._newobj()
+        self._out('<<')
+        self._putinfo()
+        self._out('>>')
+        self._out('endobj')
+        # Catalog
+        self._newobj()
+        self._out('<<')
+        self._putcatalog()
+        self._out('>>')
+        self._out('endobj')
+        # Cross-ref
+        xref_offset = self._offset()
+        self._out('xref')
+        self._out(f'0 {self.n + 1}')
+        self._out('0000000000 65535 f ')
+        for i in range(1, self.n + 1):
+            self._out('%010d 00000 n ' % self.offsets[i])
+        # Trailer
+        self._out('trailer')
+        self._out('<<')
+        self._puttrailer()
+        self._out('>>')
+        self._out('startxref')
+        self._out(xref_offset)
+        self._out('%%EOF')
+        self.state = 3
+        self._flush()
+
+class ChapterPDFGenerator(PDFGenerator):
+    """Renders one article chapter by itself, for merging into a StreamingPDFGenerator
+    
+    The page number is not known in a worker, so the footer leaves
+    FOOTER_PLACEHOLDER where the merge step writes it.
+    """
+    
+    def footer(self):
+        self._footer_style()
+        self._out(FOOTER_PLACEHOLDER)
+    
+    def render(self, qa_pairs, continued=False):
+        """Page contents and TTF glyph subsets for a chapter (an empty qa_pairs gives the closing blank page)
+        
+        With continued, the chapter starts with the styles the previous
+        chapter's last Q&A block leaves behind, as it would in one document.
+        """
+        self.set_auto_page_break(auto=True, margin=15)
+        if continued:
+            self.set_font(self.font_name, '', 11)
+            self.set_text_color(0, 0, 0)
+            self.set_draw_color(200, 200, 200)
+        
+        self.add_page()
+        if qa_pairs:
+            article = qa_pairs[0].article
+            self.chapter_title(article.title, article.date, article.url)
+            for qa in qa_pairs:
+                self.qa_block(qa.question, qa.answer, qa.speaker)
+        
+        self.in_footer = 1
+        self.footer()
+        self.in_footer = 0
+        self._endpage()
+        return [self.pages[n] for n in range(1, self.page + 1)], self.glyph_subsets()
+
+class _FooterRenderer(PDFGenerator):
+    """Produces the footer text operators that replace FOOTER_PLACEHOLDER"""
+    
+    def __init__(self):
+        super().__init__()
+        self.add_page()
+        self.in_footer = 1
+        self._footer_style()
+    
+    def operators(self, page_no):
+        self.pages[self.page] = ''
+        self.set_y(-15)
+        self.cell(0, 10, self.footer_text(page_no), 0, 0, 'C')
+        return self.pages[self.page]
+
+def _render_chapter(job):
+    qa_pairs, continued = job
+    return ChapterPDFGenerator().render(qa_pairs, continued)
+
+def _chapter_jobs(records):
+    continued = False
+    for _, qa_pairs in groupby(records, key=_ARTICLE):
+        yield list(qa_pairs), continued
+        continued = True
+    # The blank page every document has ended with
+    yield [], continued
+
+def _map_ordered(executor, fn, items, window):
+    """executor.map() that keeps at most `window` items in flight, so `items` is read lazily"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _write_pdf_parallel(records, output, processes):
+    """Render chapters in worker processes and merge them in order with continuous page numbers"""
+    pdf = StreamingPDFGenerator(output)
+    footers = _FooterRenderer()
+    
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for pages, subsets in _map_ordered(executor, _render_chapter, _chapter_jobs(records), processes * 2):
+            pdf.add_glyph_subsets(subsets)
+            for content in pages:
+                pdf.adopt_page(content.replace(FOOTER_PLACEHOLDER + "\n", footers.operators(pdf.page + 1), 1))
+    
+    # Fonts are embedded at the end, with every glyph the workers and footers used
+    pdf.add_glyph_subsets(footers.glyph_subsets())
+    pdf.finish()
+    return pdf.page
+
+def write_pdf(records: Iterable[QAPair], output: Union[str, BinaryIO], processes: int = 1) -> int:
+    """Stream QAPair records into a PDF, one article chapter at a time
+    
+    Records of the same article must be consecutive, as create_qa_pairs
+    returns them. Pages are written to `output` (a filename or writable
+    binary stream) as they fill up, so memory does not grow with the
+    corpus. With processes > 1, chapters are laid out in that many worker
+    processes and merged in order. Returns the number of pages written.
+    """
+    if not hasattr(output, 'write'):
+        with open(output, 'wb') as f:
+            return write_pdf(records, f, processes)
+    
+    if processes > 1:
+        return _write_pdf_parallel(records, output, processes)
+    
+    pdf = StreamingPDFGenerator(output)
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
     
-    # Group data by article
-    articles = {}
-    for item in data:
-        article_id = f"{item['article_title']} ({item['article_date']})"
-        if article_id not in articles:
-            articles[article_id] = {
-                'title': item['article_title'],
-                'date': item['article_date'],
-                'url': item['article_url'],
-                'qa_pairs': []
-            }
-        articles[article_id]['qa_pairs'].append(item)
-    
     # Process each article
-    for article_id, article in articles.items():
-        pdf.chapter_title(article['title'], article['date'], article['url'])
+    for article, qa_pairs in groupby(records, key=_ARTICLE):
+        pdf.chapter_title(article.title, article.date, article.url)
         
         # Add Q&A pairs
-        for qa in article['qa_pairs']:
-            pdf.qa_block(qa['question'], qa['answer'], qa['speaker'])
-            
+        for qa in qa_pairs:
+            pdf.qa_block(qa.question, qa.answer, qa.speaker)
+        
         pdf.add_page()
     
-    pdf.output(filename)
\ No newline at end of file
+    pdf.close()
+    return pdf.page
+
+def create_pdf(data: List[QAPair], output: Union[str, BinaryIO, None] = None,
+               processes: int = 1) -> Optional[bytes]:
+    """Render Q&A pairs to a PDF
+    
+    `data` holds QAPair records; old-style dicts (e.g. loaded from JSON)
+    are converted. `output` may be a filename or a writable binary
+    stream; without one the document is returned as bytes, so nothing
+    touches the disk. `processes` is passed on to write_pdf().
+    """
+    # Group data by article
+    records = chain.from_iterable(group_by_article(qa_pairs_from_dicts(data)).values())
+    
+    if output is None:
+        buffer = io.BytesIO()
+        write_pdf(records, buffer, processes)
+        return buffer.getvalue()
+    write_pdf(records, output, processes)
+    return None
@@ -1,184 +1,644 @@
-import requests
-import json
-from typing import List, Dict
+from typing import Callable, Iterable, List, Optional
+import logging
 import re
-import hashlib
-import random
-import time
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import chain
+
+import requests
+
+from config import (
+    LLM_MAX_WORKERS,
+    LLM_SEGMENT_BATCH_SIZE,
+    LLM_CONTEXT_TOKENS,
+    LLM_PROMPT_OVERHEAD_TOKENS,
+    LLM_SEGMENT_TOKENS,
+    LLM_MIN_SEGMENT_TOKENS,
+    LLM_EXCERPT_TOKENS,
+)
+from processing.llm_cache import cache_key, get_llm_cache
+from processing.llm_backend import LLMBackend, get_backend
+from processing.llm_client import LLMRequestError
+from processing.dedup import QADeduplicator, jaccard, significant_tokens
+from processing.tokenizer import get_tokenizer, split_to_budget
+from records import Paragraph, QAPair
+
+logger = logging.getLogger(__name__)
+
+# Per-speaker cap on accepted pairs and the Jaccard thresholds used for dedup
+MAX_PAIRS_PER_SPEAKER = 10
+QUESTION_SIMILARITY_THRESHOLD = 0.4
+ANSWER_SIMILARITY_THRESHOLD = 0.6
+
+# Stop event of the concurrent speaker run a worker thread belongs to; its
+# requests still waiting for rate-limit budget are skipped once it is set
+_worker = threading.local()
 
-# API key for Groq
-API_KEY = ''  # Replace with your actual Groq API key
+def create_qa_pairs(paragraphs: Iterable[Paragraph], concurrent: bool = False,
+                    max_workers: int = LLM_MAX_WORKERS, batched: bool = False,
+                    stream: bool = False, on_pair: Optional[Callable[[QAPair], None]] = None,
+                    speaker_filter: Optional[Callable[[str], bool]] = None,
+                    backend: Optional[LLMBackend] = None) -> List[QAPair]:
+    """Create question-answer pairs from article paragraphs with diverse themes
 
-def create_qa_pairs(paragraphs: List[Dict]) -> List[Dict]:
-    """Create question-answer pairs from article paragraphs with diverse themes"""
+    `paragraphs` may be any iterable, such as iter_dialogue(); only the
+    paragraph text is kept, grouped by each paragraph's Article and
+    speaker, and the pairs refer to the same Article. With
+    concurrent, each speaker's LLM requests are dispatched in parallel;
+    with batched, several themes or segments share one request. With
+    stream, direct and segment completions are parsed as they arrive and
+    abandoned once the speaker has enough pairs. on_pair is called from
+    the calling thread with each pair as soon as it is accepted.
+    speaker_filter(speaker) decides whose paragraphs are used at all;
+    rejected speakers' text is dropped before any LLM request. Requests
+    go to `backend`, or to the process-wide get_backend() without one.
+    
+    Raises LLMRequestError when failed LLM requests leave a speaker short
+    of pairs, so the article can be retried rather than recorded as done.
+    """
     qa_pairs = []
+    backend = backend or get_backend()
+    
+    # Each speaker is checked once, not once per paragraph
+    wanted_speakers = {}
     
-    # Group paragraphs by article
+    # Group paragraph text by article and speaker
     articles = {}
     for para in paragraphs:
-        article_id = f"{para['article_title']} ({para['article_date']})"
-        if article_id not in articles:
-            articles[article_id] = {
-                'title': para['article_title'],
-                'date': para['article_date'],
-                'url': para['article_url'],
-                'content': []
-            }
-        articles[article_id]['content'].append(para)
+        speaker = para.speaker
+        if speaker_filter is not None:
+            if speaker not in wanted_speakers:
+                wanted_speakers[speaker] = speaker_filter(speaker)
+            if not wanted_speakers[speaker]:
+                continue
+        
+        speaker_content = articles.get(para.article)
+        if speaker_content is None:
+            speaker_content = articles[para.article] = defaultdict(list)
+        content = para.content.strip()
+        if content:
+            speaker_content[speaker].append(content)
     
     # Process each article
-    for article_id, article in articles.items():
-        print(f"\nProcessing article: {article['title']}")
-        
-        # Group content by speaker
-        speaker_content = defaultdict(list)
-        
-        for para in article['content']:
-            speaker = para['speaker']
-            content = para['content'].strip()
-            if content:
-                speaker_content[speaker].append(content)
+    for article, speaker_content in articles.items():
+        logger.info(f"Processing article: {article.title}")
         
         # Process each speaker's content
         for speaker, content_list in speaker_content.items():
             # Combine all content for this speaker
             full_text = "\n\n".join(content_list)
             
-            print(f"Processing content for {speaker}, {len(full_text.split())} words")
-            
-            # Divide content into thematic segments for diverse questions
-            segments = segment_article(full_text)
-            print(f"Divided into {len(segments)} thematic segments")
+            logger.info(f"Processing content for {speaker}, {len(full_text.split())} words")
             
-            # Track used questions to avoid duplicates
-            used_questions = set()
-            used_answers = []
+            # Divide content into segments that fill the prompt budget
+            segments = segment_article(full_text, _segment_budget(batched))
+            logger.info(f"Divided into {len(segments)} thematic segments")
             
-            # Generate Q&A pairs using multiple approaches
-            article_qa_pairs = []
-            
-            # 1. Try direct generation first
-            direct_pairs = generate_qa_pairs_direct(
-                full_text[:4000],  # Use beginning of article
-                speaker,
-                article['title'],
-                article['date'],
-                article['url'],
-                num_pairs=5
-            )
+            if concurrent:
+                article_qa_pairs = _generate_speaker_pairs_concurrent(
+                    full_text, segments, speaker, article, backend, max_workers, batched, stream, on_pair
+                )
+            else:
+                article_qa_pairs = _generate_speaker_pairs(
+                    full_text, segments, speaker, article, backend, batched, stream, on_pair
+                )
             
+            # Add the Q&A pairs to our result list
+            qa_pairs.extend(article_qa_pairs)
+            logger.info(f"Total Q&A pairs for article: {len(article_qa_pairs)}")
+    
+    return qa_pairs
+
+def _theme_prompts(speaker):
+    """Themed questions used to broaden coverage beyond the direct prompt"""
+    return [
+        {"name": "historical", "prompt": f"What historical context or background does {speaker} provide in this article? Explain in detail."},
+        {"name": "methodology", "prompt": f"What methodology or analytical approach does {speaker} employ in this analysis? Explain thoroughly."},
+        {"name": "criticism", "prompt": f"What criticisms or counter-arguments does {speaker} address in this text? Provide a comprehensive answer."},
+        {"name": "implications", "prompt": f"What broader implications or consequences does {speaker} suggest will result from these events or policies?"},
+        {"name": "alternatives", "prompt": f"What alternatives or solutions does {speaker} propose in this article? Explain fully."}
+    ]
+
+def _accepted(pair, article_qa_pairs, on_pair):
+    """Record a pair that passed dedup and report it to the caller"""
+    article_qa_pairs.append(pair)
+    if on_pair is not None:
+        on_pair(pair)
+
+def _attempt(failures, generate, *args, **kwargs):
+    """Call a generate_* function, recording a failed LLM request in `failures` instead of raising"""
+    try:
+        return generate(*args, **kwargs)
+    except LLMRequestError as e:
+        failures.append(e)
+        return None
+
+def _check_failures(failures, article_qa_pairs, speaker):
+    """Raise if failed requests left a speaker with fewer pairs than it would otherwise get"""
+    if failures and len(article_qa_pairs) < MAX_PAIRS_PER_SPEAKER:
+        raise LLMRequestError(f"{len(failures)} LLM request(s) failed for {speaker}: {failures[0]}")
+
+def _close(pairs):
+    """Stop a streamed generation whose remaining pairs are no longer needed"""
+    close = getattr(pairs, 'close', None)
+    if close is not None:
+        close()
+
+def _generate_speaker_pairs(full_text, segments, speaker, article, backend, batched=False, stream=False, on_pair=None):
+    """Run the direct, themed and segment stages one after another until enough pairs exist"""
+    # Track used questions to avoid duplicates (ordered, so prompts are reproducible)
+    used_questions = []
+    used_answers = []
+    
+    # Generate Q&A pairs using multiple approaches
+    article_qa_pairs = []
+    dedup = QADeduplicator(QUESTION_SIMILARITY_THRESHOLD, ANSWER_SIMILARITY_THRESHOLD)
+    
+    # Failed requests; later stages can still make up for them
+    failures = []
+    
+    # 1. Try direct generation first
+    direct_pairs = _attempt(
+        failures,
+        generate_qa_pairs_direct,
+        full_text,
+        speaker,
+        article,
+        num_pairs=5,
+        stream=stream,
+        backend=backend
+    ) or []
+    
+    # Add non-duplicate pairs
+    try:
+        for pair in direct_pairs:
+            if len(article_qa_pairs) >= MAX_PAIRS_PER_SPEAKER:
+                break
+        
+            # Skip if too similar to existing questions
+            if not dedup.accept(pair):
+                continue
+        
+            _accepted(pair, article_qa_pairs, on_pair)
+            used_questions.append(pair.question)
+            used_answers.append(pair.answer)
+    except LLMRequestError as e:
+        # A stream that broke off; the pairs read before it still count
+        failures.append(e)
+    _close(direct_pairs)
+    
+    logger.info(f"Generated {len(article_qa_pairs)} Q&A pairs from direct approach")
+    
+    # 2. Try themed questions if we need more
+    if len(article_qa_pairs) < MAX_PAIRS_PER_SPEAKER:
+        # Use multiple themed prompts
+        themes = _theme_prompts(speaker)
+        
+        # In batched mode one request answers every theme up front
+        if batched:
+            themed_results = _themed_pairs_batched(full_text, speaker, article, themes, failures, backend)
+        
+        # Try each theme
+        for i, theme in enumerate(themes):
+            if len(article_qa_pairs) >= MAX_PAIRS_PER_SPEAKER:
+                break
+    
+            # Try to generate a Q&A pair for this theme
+            if batched:
+                pair = themed_results[i]
+            else:
+                pair = _attempt(
+                    failures,
+                    generate_themed_qa_pair,
+                    full_text,
+                    speaker,
+                    article,
+                    theme["prompt"],
+                    backend=backend
+                )
+    
+            if pair and dedup.accept(pair):
+                _accepted(pair, article_qa_pairs, on_pair)
+                used_questions.append(pair.question)
+                used_answers.append(pair.answer)
+    
+    logger.info(f"Generated {len(article_qa_pairs)} Q&A pairs after themed approach")
+    
+    # 3. Try segment-based questions if we still need more
+    if len(article_qa_pairs) < MAX_PAIRS_PER_SPEAKER:
+        long_segments = _segments_to_ask(segments)
+        
+        # Batched mode sends several segments per request
+        step = LLM_SEGMENT_BATCH_SIZE if batched else 1
+        for start in range(0, len(long_segments), step):
+            if len(article_qa_pairs) >= MAX_PAIRS_PER_SPEAKER:
+                break
+            batch = long_segments[start:start + step]
+    
+            # Use a higher temperature for more diversity as we generate more questions
+            temperature = min(0.7 + (len(article_qa_pairs) * 0.05), 0.9)
+    
+            # Try to generate Q&A pairs for these segments
+            if batched:
+                batch_results = _segment_pairs_batched(
+                    batch, speaker, article, used_questions, temperature, failures, backend
+                )
+            else:
+                batch_results = [_attempt(
+                    failures,
+                    generate_qa_pairs_segment,
+                    batch[0],
+                    speaker,
+                    article,
+                    used_questions,
+                    temperature=temperature,
+                    stream=stream,
+                    backend=backend
+                ) or []]
+    
             # Add non-duplicate pairs
-            for pair in direct_pairs:
-                if len(article_qa_pairs) >= 10:
-                    break
-                    
-                # Skip if too similar to existing questions
-                if any(calculate_similarity(pair['question'], q['question']) > 0.4 for q in article_qa_pairs):
-                    continue
-                
-                article_qa_pairs.append(pair)
-                used_questions.add(pair['question'])
-                used_answers.append(pair['answer'])
-            
-            print(f"Generated {len(article_qa_pairs)} Q&A pairs from direct approach")
-            
-            # 2. Try themed questions if we need more
-            if len(article_qa_pairs) < 10:
-                # Use multiple themed prompts
-                themes = [
-                    {"name": "historical", "prompt": f"What historical context or background does {speaker} provide in this article? Explain in detail."},
-                    {"name": "methodology", "prompt": f"What methodology or analytical approach does {speaker} employ in this analysis? Explain thoroughly."},
-                    {"name": "criticism", "prompt": f"What criticisms or counter-arguments does {speaker} address in this text? Provide a comprehensive answer."},
-                    {"name": "implications", "prompt": f"What broader implications or consequences does {speaker} suggest will result from these events or policies?"},
-                    {"name": "alternatives", "prompt": f"What alternatives or solutions does {speaker} propose in this article? Explain fully."}
-                ]
-                
-                # Try each theme
-                for theme in themes:
-                    if len(article_qa_pairs) >= 10:
-                        break
-                        
-                    # Try to generate a Q&A pair for this theme
-                    pair = generate_themed_qa_pair(
-                        full_text,
-                        speaker,
-                        article['title'],
-                        article['date'],
-                        article['url'],
-                        theme["prompt"]
-                    )
-                    
-                    if pair and not any(calculate_similarity(pair['question'], q['question']) > 0.4 for q in article_qa_pairs):
-                        article_qa_pairs.append(pair)
-                        used_questions.add(pair['question'])
-                        used_answers.append(pair['answer'])
-            
-            print(f"Generated {len(article_qa_pairs)} Q&A pairs after themed approach")
-            
-            # 3. Try segment-based questions if we still need more
-            if len(article_qa_pairs) < 10:
-                for i, segment in enumerate(segments):
-                    if len(article_qa_pairs) >= 10:
+            try:
+                for pair in chain.from_iterable(batch_results):
+                    if len(article_qa_pairs) >= MAX_PAIRS_PER_SPEAKER:
                         break
-                        
-                    # Skip very short segments
-                    if len(segment.split()) < 100:
+        
+                    # Skip if too similar to existing questions or answers
+                    if not dedup.accept(pair, check_answer=True):
                         continue
-                        
-                    # Use a higher temperature for more diversity as we generate more questions
-                    temperature = min(0.7 + (len(article_qa_pairs) * 0.05), 0.9)
-                    
-                    # Try to generate Q&A pairs for this segment
-                    segment_pairs = generate_qa_pairs_segment(
-                        segment,
-                        speaker,
-                        article['title'],
-                        article['date'],
-                        article['url'],
-                        used_questions,
-                        temperature=temperature
-                    )
-                    
-                    # Add non-duplicate pairs
-                    for pair in segment_pairs:
-                        if len(article_qa_pairs) >= 10:
-                            break
-                            
-                        # Skip if too similar to existing questions
-                        if any(calculate_similarity(pair['question'], q['question']) > 0.4 for q in article_qa_pairs):
-                            continue
-                            
-                        # Skip if answer too similar to existing answers
-                        if any(calculate_similarity(pair['answer'], q['answer']) > 0.6 for q in article_qa_pairs):
-                            continue
-                        
-                        article_qa_pairs.append(pair)
-                        used_questions.add(pair['question'])
-                        used_answers.append(pair['answer'])
+        
+                    _accepted(pair, article_qa_pairs, on_pair)
+                    used_questions.append(pair.question)
+                    used_answers.append(pair.answer)
+            except LLMRequestError as e:
+                failures.append(e)
+            for pairs in batch_results:
+                _close(pairs)
+    
+    logger.info(f"Generated {len(article_qa_pairs)} Q&A pairs after segment approach")
+    _check_failures(failures, article_qa_pairs, speaker)
+    return article_qa_pairs
+
+def _until_stopped(stop, generate, *args, **kwargs):
+    """Call a generate_* function in a worker thread, skipping its LLM requests once `stop` is set"""
+    _worker.stop = stop
+    try:
+        return generate(*args, **kwargs)
+    finally:
+        _worker.stop = None
+
+def _collect_stream(pairs, stop, failures):
+    """Read a streamed generation in a worker thread, abandoning it once `stop` is set"""
+    _worker.stop = stop
+    collected = []
+    try:
+        for pair in pairs:
+            collected.append(pair)
+            if stop.is_set():
+                break
+    except LLMRequestError as e:
+        failures.append(e)
+    finally:
+        _close(pairs)
+        _worker.stop = None
+    return collected
+
+def _generate_speaker_pairs_concurrent(full_text, segments, speaker, article, backend, max_workers=LLM_MAX_WORKERS,
+                                       batched=False, stream=False, on_pair=None):
+    """Fire the direct, themed and segment requests in parallel and dedup results as they arrive
+
+    Requests are issued speculatively, so segment prompts cannot list the
+    questions accepted so far; the similarity checks still apply to every
+    result. Once enough pairs are accepted, requests that have not started
+    are cancelled, ones still waiting for rate-limit budget are never sent,
+    and streamed ones still running are cut short.
+    """
+    article_qa_pairs = []
+    dedup = QADeduplicator(QUESTION_SIMILARITY_THRESHOLD, ANSWER_SIMILARITY_THRESHOLD)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+    stop = threading.Event()
+    failures = []
+    
+    if stream:
+        futures[executor.submit(
+            _collect_stream,
+            generate_qa_pairs_direct(
+                full_text, speaker, article,
+                num_pairs=5, stream=True, backend=backend
+            ),
+            stop, failures
+        )] = 'direct'
+    else:
+        futures[executor.submit(
+            _until_stopped, stop,
+            generate_qa_pairs_direct,
+            full_text,
+            speaker, article,
+            num_pairs=5, backend=backend
+        )] = 'direct'
+    
+    themes = _theme_prompts(speaker)
+    if batched:
+        futures[executor.submit(
+            _until_stopped, stop,
+            _themed_pairs_batched, full_text, speaker, article, themes, failures, backend
+        )] = 'themed_batch'
+    else:
+        for theme in themes:
+            futures[executor.submit(
+                _until_stopped, stop,
+                generate_themed_qa_pair,
+                full_text, speaker, article,
+                theme["prompt"], backend=backend
+            )] = 'themed'
+    
+    # Later segments get a higher temperature for diversity
+    long_segments = _segments_to_ask(segments)
+    step = LLM_SEGMENT_BATCH_SIZE if batched else 1
+    for i in range(0, len(long_segments), step):
+        temperature = min(0.7 + (i * 0.05), 0.9)
+        if batched:
+            futures[executor.submit(
+                _until_stopped, stop,
+                _segment_pairs_batched,
+                long_segments[i:i + step], speaker, article, [], temperature, failures, backend
+            )] = 'segment_batch'
+        elif stream:
+            futures[executor.submit(
+                _collect_stream,
+                generate_qa_pairs_segment(
+                    long_segments[i], speaker, article,
+                    [],
+                    temperature=temperature, stream=True, backend=backend
+                ),
+                stop, failures
+            )] = 'segment'
+        else:
+            futures[executor.submit(
+                _until_stopped, stop,
+                generate_qa_pairs_segment,
+                long_segments[i], speaker, article,
+                [],
+                temperature=temperature, backend=backend
+            )] = 'segment'
+    
+    try:
+        for future in as_completed(futures):
+            kind = futures[future]
+            try:
+                result = future.result()
+            except LLMRequestError as e:
+                failures.append(e)
+                continue
+            # Normalize every result to a flat list of pairs
+            if kind == 'themed':
+                result = [result] if result else []
+            elif kind == 'themed_batch':
+                result = [pair for pair in result if pair]
+            elif kind == 'segment_batch':
+                result = list(chain.from_iterable(result))
             
-            print(f"Generated {len(article_qa_pairs)} Q&A pairs after segment approach")
+            for pair in result:
+                if len(article_qa_pairs) >= MAX_PAIRS_PER_SPEAKER:
+                    break
+                
+                # Skip if too similar to existing questions; segment answers
+                # must also differ from existing answers
+                if not dedup.accept(pair, check_answer=kind.startswith('segment')):
+                    continue
+                
+                _accepted(pair, article_qa_pairs, on_pair)
             
-            # Add the Q&A pairs to our result list
-            qa_pairs.extend(article_qa_pairs)
-            print(f"Total Q&A pairs for article: {len(article_qa_pairs)}")
+            if len(article_qa_pairs) >= MAX_PAIRS_PER_SPEAKER:
+                break
+    finally:
+        # Drop requests that have not started yet and skip ones waiting for
+        # rate-limit budget; requests already sent finish in the background,
+        # except streams, which stop at their next pair
+        stop.set()
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
     
-    return qa_pairs
+    logger.info(f"Generated {len(article_qa_pairs)} Q&A pairs from {len(futures)} parallel requests")
+    _check_failures(failures, article_qa_pairs, speaker)
+    return article_qa_pairs
+
+def _text_budget(budget, max_tokens, items=1):
+    """Article tokens per item that fit both `budget` and the model context next to the prompt and completion"""
+    available = LLM_CONTEXT_TOKENS - LLM_PROMPT_OVERHEAD_TOKENS - max_tokens
+    return max(1, min(budget, available // items))
+
+def _segment_budget(batched=False):
+    """Token budget per segment; batched requests share one context between several segments"""
+    if batched:
+        return _text_budget(LLM_SEGMENT_TOKENS, min(1000 * LLM_SEGMENT_BATCH_SIZE, 4000), LLM_SEGMENT_BATCH_SIZE)
+    return _text_budget(LLM_SEGMENT_TOKENS, 1000)
+
+def _segments_to_ask(segments):
+    """Segments worth a segment request
+
+    segment_article only returns a segment under LLM_MIN_SEGMENT_TOKENS
+    when it is the speaker's whole text, which the direct and themed
+    requests already received in full, so that one is skipped.
+    """
+    if len(segments) == 1 and get_tokenizer().count(segments[0]) < LLM_MIN_SEGMENT_TOKENS:
+        return []
+    return segments
+
+def _excerpt(text, max_tokens):
+    """Beginning of `text` that fits the excerpt budget of a request with this completion size"""
+    return get_tokenizer().truncate(text, _text_budget(LLM_EXCERPT_TOKENS, max_tokens))
+
+def _themed_pairs_batched(full_text, speaker, article, themes, failures, backend=None):
+    """Answer all themes in one request, falling back to a single call per unparsed theme"""
+    results = _attempt(
+        failures, generate_themed_qa_pairs_batch,
+        full_text, speaker, article,
+        [theme["prompt"] for theme in themes], backend=backend
+    ) or [None] * len(themes)
+    for i, theme in enumerate(themes):
+        if results[i] is None:
+            results[i] = _attempt(
+                failures, generate_themed_qa_pair,
+                full_text, speaker, article,
+                theme["prompt"], backend=backend
+            )
+    return results
+
+def _segment_pairs_batched(segments, speaker, article, used_questions, temperature, failures, backend=None):
+    """Question several segments in one request, falling back to a single call per unparsed segment"""
+    results = _attempt(
+        failures, generate_qa_pairs_segments_batch,
+        segments, speaker, article,
+        used_questions, temperature=temperature, backend=backend
+    ) or [None] * len(segments)
+    for i, segment in enumerate(segments):
+        if results[i] is None:
+            results[i] = _attempt(
+                failures, generate_qa_pairs_segment,
+                segment, speaker, article,
+                used_questions, temperature=temperature, backend=backend
+            ) or []
+    return results
+
+def _completion_key(payload):
+    return cache_key(
+        payload["model"],
+        payload["messages"][-1]["content"],
+        payload.get("temperature"),
+        payload.get("top_p"),
+        payload.get("max_tokens"),
+    )
+
+def _chat_completion(payload, backend=None, use_cache=True):
+    """Send a chat completion request to `backend` (default get_backend()) and return the generated text.
+
+    Raises LLMRequestError if the request fails after the client's retries.
+    Returns None without sending when the worker's stop event is already set.
+
+    Identical requests (model, prompt, temperature, top_p, max_tokens) are
+    served from the persistent LLM cache without an API call.
+    """
+    cache = get_llm_cache()
+    key = _completion_key(payload)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
+    # Waits for rate-limit budget and re-queues throttled calls instead of failing
+    backend = backend or get_backend()
+    try:
+        response = backend.client().post(payload, backend.headers(), cancel=getattr(_worker, 'stop', None))
+    except requests.RequestException as e:
+        raise LLMRequestError(f"LLM request failed: {str(e)}") from e
+    
+    if response is None:
+        # Enough pairs were found while this request waited for budget
+        return None
+    
+    if response.status_code != 200:
+        logger.warning(f"API Error ({response.status_code}): {response.text}")
+        raise LLMRequestError(f"API Error ({response.status_code})")
+    
+    try:
+        response_data = response.json()
+    except ValueError as e:
+        raise LLMRequestError("Invalid JSON in API response") from e
+    
+    # Extract the generated text
+    if 'choices' in response_data and response_data['choices']:
+        generated_text = response_data['choices'][0]['message']['content']
+        cache.put(key, generated_text)
+        return generated_text
+    
+    logger.warning("No choices in API response")
+    raise LLMRequestError("No choices in API response")
 
-def generate_qa_pairs_direct(text, speaker, article_title, article_date, article_url, num_pairs=5):
-    """Generate Q&A pairs directly using the Groq API"""
-    # Groq API endpoint
-    api_url = "https://api.groq.com/openai/v1/chat/completions"
+def _stream_completion(payload, backend=None, use_cache=True):
+    """Yield the generated text in chunks as it streams in; a cached completion arrives as one chunk
+
+    The full text is cached only once the stream has been read to the
+    end, so stopping early never stores a truncated completion. A
+    rejected or broken-off stream raises LLMRequestError.
+    """
+    cache = get_llm_cache()
+    key = _completion_key(payload)
+    if use_cache:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+    
+    backend = backend or get_backend()
+    chunks = []
+    try:
+        for chunk in backend.client().stream(payload, backend.headers(), cancel=getattr(_worker, 'stop', None)):
+            chunks.append(chunk)
+            yield chunk
+    except (requests.RequestException, ValueError) as e:
+        raise LLMRequestError(f"LLM stream failed: {str(e)}") from e
+    
+    if chunks:
+        cache.put(key, "".join(chunks))
+
+class QAStreamParser:
+    """Incremental form of the "Q: ...\nA: ..." parsing applied to finished completions
+
+    feed() takes text as it streams in and returns the (question, answer)
+    pairs whose answer is complete, i.e. already followed by the next
+    "Q:"; close() returns the last pair once the stream has ended.
+    Together they produce the same pairs as re.findall over the full text.
+    """
+    
+    _NEXT_QUESTION = re.compile(r"\n\s*Q:")
     
-    # Headers for the API request
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
+    def __init__(self):
+        self._buffer = ""
+    
+    def feed(self, chunk):
+        self._buffer += chunk
+        return self._drain(final=False)
+    
+    def close(self):
+        return self._drain(final=True)
+    
+    def _drain(self, final):
+        pairs = []
+        while True:
+            start = self._buffer.find("Q: ")
+            if start < 0:
+                # Keep a tail in case "Q: " is split across chunks
+                self._buffer = self._buffer[-2:]
+                break
+            answer_start = self._buffer.find("\nA: ", start + 3)
+            if answer_start < 0:
+                break
+            next_question = self._NEXT_QUESTION.search(self._buffer, answer_start + 4)
+            if next_question:
+                end = next_question.start()
+            elif final:
+                end = len(self._buffer)
+            else:
+                break
+            pairs.append((self._buffer[start + 3:answer_start], self._buffer[answer_start + 4:end]))
+            self._buffer = self._buffer[end:]
+        return pairs
+
+def _stream_pairs(payload, speaker, article, label, backend):
+    """Yield each Q&A pair of a streamed completion as soon as its answer is complete"""
+    parser = QAStreamParser()
+    
+    def to_pairs(matches):
+        return [QAPair(question.strip(), answer.strip(), speaker, article) for question, answer in matches]
+    
+    try:
+        for chunk in _stream_completion(payload, backend):
+            yield from to_pairs(parser.feed(chunk))
+        yield from to_pairs(parser.close())
+    except LLMRequestError:
+        raise
+    except Exception as e:
+        logger.warning(f"Error in {label} API call: {str(e)}")
+
+def generate_qa_pairs_direct(text, speaker, article, num_pairs=5, stream=False, backend=None):
+    """Generate Q&A pairs directly using the LLM API
+
+    With stream, returns an iterator that yields each pair as soon as its
+    answer is complete; close it to stop the generation early. A failed
+    request raises LLMRequestError, as in the other generate_* functions.
+    Requests go to `backend`, or to get_backend() without one.
+    """
+    backend = backend or get_backend()
+    
+    # Use beginning of article, up to the excerpt budget
+    text = _excerpt(text, 1500)
     
     # Simplified prompt to ensure we get results
     prompt = f"""
-Based on the following excerpt from {speaker}'s article "{article_title}", generate {num_pairs} unique Q&A pairs.
+Based on the following excerpt from {speaker}'s article "{article.title}", generate {num_pairs} unique Q&A pairs.
 
 EXCERPT:
 ```
@@ -197,32 +657,23 @@ A: [Answer]
 Generate EXACTLY {num_pairs} pairs, separated by blank lines.
 """
     
-    # Parameters for Groq API (using LLaMA 3 model which has fast inference)
-    payload = {
-        "model": "llama3-70b-8192",  # Groq's LLaMA 3 model
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.8,
-        "top_p": 0.95,
-        "max_tokens": 1500
-    }
+    # Parameters for the configured backend
+    payload = backend.payload(
+        prompt,
+        temperature=0.8,
+        top_p=0.95,
+        max_tokens=1500
+    )
+    
+    if stream:
+        return _stream_pairs(payload, speaker, article, "streamed", backend)
     
     try:
-        print("Calling Groq API...")
-        response = requests.post(api_url, headers=headers, json=payload, timeout=30)  # Reduced timeout for faster API
+        logger.info(f"Calling {backend.name} API...")
+        generated_text = _chat_completion(payload, backend)
         
-        # Print response status for debugging
-        print(f"API Status Code: {response.status_code}")
-        
-        if response.status_code != 200:
-            print(f"API Error: {response.text}")
-            return []
-        
-        response_data = response.json()
-        
-        # Extract the generated text
-        if 'choices' in response_data and response_data['choices']:
-            generated_text = response_data['choices'][0]['message']['content']
-            print(f"Generated text length: {len(generated_text)}")
+        if generated_text is not None:
+            logger.info(f"Generated text length: {len(generated_text)}")
             
             # Parse Q&A pairs
             qa_pairs = []
@@ -230,42 +681,30 @@ Generate EXACTLY {num_pairs} pairs, separated by blank lines.
             matches = re.findall(qa_pattern, generated_text, re.DOTALL)
             
             for question, answer in matches:
-                qa_pairs.append({
-                    'question': question.strip(),
-                    'answer': answer.strip(),
-                    'speaker': speaker,
-                    'article_title': article_title,
-                    'article_date': article_date,
-                    'article_url': article_url
-                })
+                qa_pairs.append(QAPair(question.strip(), answer.strip(), speaker, article))
             
-            print(f"Extracted {len(qa_pairs)} Q&A pairs")
+            logger.info(f"Extracted {len(qa_pairs)} Q&A pairs")
             return qa_pairs
         else:
-            print("No choices in API response")
             return []
             
+    except LLMRequestError:
+        raise
     except Exception as e:
-        print(f"Error in API call: {str(e)}")
+        logger.warning(f"Error in API call: {str(e)}")
         return []
 
-def generate_themed_qa_pair(text, speaker, article_title, article_date, article_url, theme_prompt):
-    """Generate a single Q&A pair based on a specific theme using Groq"""
-    # Groq API endpoint
-    api_url = "https://api.groq.com/openai/v1/chat/completions"
-    
-    # Headers for the API request
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
+def generate_themed_qa_pair(text, speaker, article, theme_prompt, backend=None):
+    """Generate a single Q&A pair based on a specific theme"""
+    backend = backend or get_backend()
+    text = _excerpt(text, 800)
     
     # Craft a prompt focused on a specific theme
     prompt = f"""
-Based on this excerpt from {speaker}'s article "{article_title}":
+Based on this excerpt from {speaker}'s article "{article.title}":
 
 ```
-{text[:3000]}
+{text}
 ```
 
 Question: {theme_prompt}
@@ -277,63 +716,44 @@ Q: [Restate the question in your own words]
 A: [Your detailed answer]
 """
     
-    # Parameters for Groq API
-    payload = {
-        "model": "llama3-70b-8192",  # Fast Groq model
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.7,
-        "max_tokens": 800
-    }
+    # Parameters for the configured backend
+    payload = backend.payload(
+        prompt,
+        temperature=0.7,
+        max_tokens=800
+    )
     
     try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"API Error: {response.text}")
-            return None
-        
-        response_data = response.json()
+        generated_text = _chat_completion(payload, backend)
         
-        # Extract the generated text
-        if 'choices' in response_data and response_data['choices']:
-            generated_text = response_data['choices'][0]['message']['content']
-            
+        if generated_text is not None:
             # Parse Q&A pair
             qa_pattern = r"Q: (.*?)\nA: (.*)"
             match = re.search(qa_pattern, generated_text, re.DOTALL)
             
             if match:
-                return {
-                    'question': match.group(1).strip(),
-                    'answer': match.group(2).strip(),
-                    'speaker': speaker,
-                    'article_title': article_title,
-                    'article_date': article_date,
-                    'article_url': article_url
-                }
+                return QAPair(match.group(1).strip(), match.group(2).strip(), speaker, article)
             
+    except LLMRequestError:
+        raise
     except Exception as e:
-        print(f"Error in themed API call: {str(e)}")
+        logger.warning(f"Error in themed API call: {str(e)}")
     
     return None
 
-def generate_qa_pairs_segment(segment, speaker, article_title, article_date, article_url, used_questions, temperature=0.8, num_pairs=2):
-    """Generate Q&A pairs for a specific segment of the article using Groq"""
-    # Groq API endpoint
-    api_url = "https://api.groq.com/openai/v1/chat/completions"
-    
-    # Headers for the API request
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
+def generate_qa_pairs_segment(segment, speaker, article, used_questions, temperature=0.8, num_pairs=2,
+                              stream=False, backend=None):
+    """Generate Q&A pairs for a specific segment of the article
+
+    With stream, returns an iterator of pairs as in generate_qa_pairs_direct().
+    """
+    backend = backend or get_backend()
     # Used questions for context
     used_q_text = "\n".join([f"- {q}" for q in list(used_questions)[:5]]) if used_questions else "None yet."
     
     # Craft a prompt focused on generating unique questions for this segment
     prompt = f"""
-This is a specific segment from {speaker}'s article "{article_title}":
+This is a specific segment from {speaker}'s article "{article.title}":
 
 ```
 {segment}
@@ -354,106 +774,245 @@ A: [Answer]
 """
     
     # Parameters with variable temperature for diversity
-    payload = {
-        "model": "llama3-70b-8192",  # Fast Groq model
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": temperature,
-        "top_p": 0.95,
-        "max_tokens": 1000
-    }
+    payload = backend.payload(
+        prompt,
+        temperature=temperature,
+        top_p=0.95,
+        max_tokens=1000
+    )
+    
+    if stream:
+        return _stream_pairs(payload, speaker, article, "streamed segment", backend)
     
     try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"API Error: {response.text}")
-            return []
-        
-        response_data = response.json()
+        generated_text = _chat_completion(payload, backend)
         
-        # Extract the generated text
-        if 'choices' in response_data and response_data['choices']:
-            generated_text = response_data['choices'][0]['message']['content']
-            
+        if generated_text is not None:
             # Parse Q&A pairs
             qa_pairs = []
             qa_pattern = r"Q: (.*?)\nA: (.*?)(?=\n\s*Q:|\Z)"
             matches = re.findall(qa_pattern, generated_text, re.DOTALL)
             
             for question, answer in matches:
-                qa_pairs.append({
-                    'question': question.strip(),
-                    'answer': answer.strip(),
-                    'speaker': speaker,
-                    'article_title': article_title,
-                    'article_date': article_date,
-                    'article_url': article_url
-                })
+                qa_pairs.append(QAPair(question.strip(), answer.strip(), speaker, article))
             
             return qa_pairs
             
+    except LLMRequestError:
+        raise
     except Exception as e:
-        print(f"Error in segment API call: {str(e)}")
+        logger.warning(f"Error in segment API call: {str(e)}")
     
     return []
 
-def segment_article(text, min_segment_words=150):
-    """Divide article into thematic segments for more diverse questioning"""
-    # Split by paragraph breaks
-    paragraphs = [p.strip() for p in text.split('\n\n') if p.strip()]
+# Section markers used by the batched prompts, e.g. "### THEME 2"
+_SECTION_PATTERN = r"^[#*\s]*{label}\s*(\d+)\W*$"
+
+def _split_sections(generated_text, label, count):
+    """Split a batched answer into per-item sections; missing items map to None"""
+    pattern = re.compile(_SECTION_PATTERN.format(label=label), re.IGNORECASE | re.MULTILINE)
+    sections = [None] * count
+    markers = list(pattern.finditer(generated_text))
+    for i, marker in enumerate(markers):
+        index = int(marker.group(1)) - 1
+        end = markers[i + 1].start() if i + 1 < len(markers) else len(generated_text)
+        if 0 <= index < count and sections[index] is None:
+            sections[index] = generated_text[marker.end():end].strip()
+    return sections
+
+def generate_themed_qa_pairs_batch(text, speaker, article, theme_prompts, backend=None):
+    """Generate one Q&A pair per theme in a single request
+
+    Returns a list aligned with theme_prompts; entries whose section could
+    not be parsed are None so the caller can retry them individually.
+    """
+    backend = backend or get_backend()
+    max_tokens = min(800 * len(theme_prompts), 4000)
+    text = _excerpt(text, max_tokens)
+    themes_text = "\n".join(f"THEME {i + 1}: {prompt}" for i, prompt in enumerate(theme_prompts))
     
-    # If very few paragraphs, just return the whole text
-    if len(paragraphs) <= 3:
-        return [text]
+    # The excerpt is sent once for all themes
+    prompt = f"""
+Based on this excerpt from {speaker}'s article "{article.title}":
+
+```
+{text}
+```
+
+Answer each of the following questions separately:
+{themes_text}
+
+For every theme, generate a detailed, comprehensive answer (at least 3-5 sentences) based ONLY on information in the text.
+Format your response as one section per theme, in order:
+
+### THEME 1
+Q: [Restate the question in your own words]
+A: [Your detailed answer]
+
+### THEME 2
+Q: ...
+A: ...
+"""
     
-    segments = []
-    current_segment = []
-    current_word_count = 0
+    payload = backend.payload(
+        prompt,
+        temperature=0.7,
+        max_tokens=max_tokens
+    )
     
-    for para in paragraphs:
-        para_words = len(para.split())
+    results = [None] * len(theme_prompts)
+    try:
+        generated_text = _chat_completion(payload, backend)
+        if generated_text is None:
+            return results
         
-        # If adding this paragraph would make segment too long, start a new one
-        if current_word_count + para_words > 600 and current_word_count >= min_segment_words:
-            segments.append("\n\n".join(current_segment))
-            current_segment = [para]
-            current_word_count = para_words
-        else:
-            current_segment.append(para)
-            current_word_count += para_words
+        for i, section in enumerate(_split_sections(generated_text, "THEME", len(theme_prompts))):
+            if not section:
+                continue
+            match = re.search(r"Q: (.*?)\nA: (.*)", section, re.DOTALL)
+            if match:
+                results[i] = QAPair(match.group(1).strip(), match.group(2).strip(), speaker, article)
     
-    # Add the final segment if not empty
-    if current_segment:
-        segments.append("\n\n".join(current_segment))
+    except LLMRequestError:
+        raise
+    except Exception as e:
+        logger.warning(f"Error in batched themed API call: {str(e)}")
     
-    # If we didn't create any segments (very short article), just return the whole text
-    if not segments:
-        return [text]
+    return results
+
+def generate_qa_pairs_segments_batch(segments, speaker, article, used_questions, temperature=0.8, num_pairs=2,
+                                     backend=None):
+    """Generate Q&A pairs for several segments in a single request
+
+    Returns a list of pair lists aligned with segments; segments whose
+    section could not be parsed are None.
+    """
+    backend = backend or get_backend()
+    used_q_text = "\n".join([f"- {q}" for q in list(used_questions)[:5]]) if used_questions else "None yet."
+    segments_text = "\n\n".join(
+        f"SEGMENT {i + 1}:\n```\n{segment}\n```" for i, segment in enumerate(segments)
+    )
     
-    return segments
+    prompt = f"""
+These are {len(segments)} segments from {speaker}'s article "{article.title}":
 
-def calculate_similarity(text1, text2):
-    """Calculate Jaccard similarity between two texts based on significant words"""
-    # Get significant words (longer than 3 chars)
-    stop_words = {"and", "or", "the", "a", "an", "in", "on", "at", "to", "for", "with", "by", "about", 
-                 "like", "as", "of", "do", "does", "how", "what", "when", "where", "why", "would", "could",
-                 "should", "their", "they", "this", "that", "these", "those", "be", "been", "being", "is", 
-                 "am", "are", "was", "were", "has", "have", "had", "not", "from"}
+{segments_text}
+
+For EACH segment, generate {num_pairs} unique Q&A pairs about THAT SPECIFIC SEGMENT that are different from these previously generated questions:
+{used_q_text}
+
+Requirements:
+1. Each question must focus on content UNIQUE to its segment
+2. Questions must be specific and detailed
+3. Answers must be comprehensive (3-5 sentences minimum)
+4. Different questions should cover different themes or aspects
+
+Format your response as one section per segment, in order:
+
+### SEGMENT 1
+Q: [Question]
+A: [Answer]
+
+Q: [Question]
+A: [Answer]
+
+### SEGMENT 2
+...
+"""
+    
+    payload = backend.payload(
+        prompt,
+        temperature=temperature,
+        top_p=0.95,
+        max_tokens=min(1000 * len(segments), 4000)
+    )
+    
+    results = [None] * len(segments)
+    try:
+        generated_text = _chat_completion(payload, backend)
+        if generated_text is None:
+            return results
+        
+        qa_pattern = r"Q: (.*?)\nA: (.*?)(?=\n\s*Q:|\Z)"
+        for i, section in enumerate(_split_sections(generated_text, "SEGMENT", len(segments))):
+            if not section:
+                continue
+            pairs = [
+                QAPair(question.strip(), answer.strip(), speaker, article)
+                for question, answer in re.findall(qa_pattern, section, re.DOTALL)
+            ]
+            if pairs:
+                results[i] = pairs
     
-    words1 = [w.lower() for w in re.findall(r'\b\w+\b', text1) 
-             if w.lower() not in stop_words and len(w) > 3]
-    words2 = [w.lower() for w in re.findall(r'\b\w+\b', text2) 
-             if w.lower() not in stop_words and len(w) > 3]
+    except LLMRequestError:
+        raise
+    except Exception as e:
+        logger.warning(f"Error in batched segment API call: {str(e)}")
+    
+    return results
+
+def segment_article(text, max_tokens=LLM_SEGMENT_TOKENS, tokenizer=None, min_tokens=LLM_MIN_SEGMENT_TOKENS):
+    """Divide article into segments of at most max_tokens for more diverse questioning
+
+    Paragraphs stay whole and in order, except ones over the budget, which
+    are split at sentence boundaries, so every paragraph lands in exactly
+    one segment. The segment count is the minimum the budget allows, and
+    sizes are evened out so no short remainder is left at the end. When a
+    paragraph too large to share a segment would still leave one under
+    min_tokens beside it, the paragraphs are split into sentences of at
+    most min_tokens and packed again, so the short segment's text is
+    merged into its neighbours. Only a text shorter than min_tokens as a
+    whole comes back as a short (single) segment.
+    """
+    tokenizer = tokenizer or get_tokenizer()
+    
+    # Split by paragraph breaks
+    paragraphs = []
+    for para in text.split('\n\n'):
+        para = para.strip()
+        if para:
+            paragraphs.extend(split_to_budget(para, max_tokens, tokenizer))
     
-    # Convert to sets for Jaccard similarity
-    set1 = set(words1)
-    set2 = set(words2)
+    if not paragraphs:
+        return [text] if text.strip() else []
     
-    if not set1 or not set2:
-        return 0.0
+    counts = [tokenizer.count(para) for para in paragraphs]
+    segments = _pack_evenly(paragraphs, counts, max_tokens)
+    if len(segments) > 1 and min(tokens for _, tokens in segments) < min_tokens:
+        pieces = [piece for para in paragraphs for piece in split_to_budget(para, min_tokens, tokenizer)]
+        segments = _pack_evenly(pieces, [tokenizer.count(piece) for piece in pieces], max_tokens)
+    return [segment for segment, _ in segments]
+
+def _pack_evenly(paragraphs, counts, max_tokens):
+    """Pack paragraphs in order into the fewest segments of at most max_tokens, evening out their sizes
+
+    Returns (segment text, token count) pairs.
+    """
+    def segment_starts(cap):
+        # Greedy packing gives the fewest segments for a given cap
+        starts = [0]
+        used = 0
+        for i, count in enumerate(counts):
+            if used and used + count > cap:
+                starts.append(i)
+                used = 0
+            used += count
+        return starts
     
-    # Calculate Jaccard similarity
-    intersection = set1.intersection(set2)
-    union = set1.union(set2)
+    # Smallest cap that still needs no more segments than the full budget
+    num_segments = len(segment_starts(max_tokens))
+    low, high = min(max(counts), max_tokens), max_tokens
+    while low < high:
+        mid = (low + high) // 2
+        if len(segment_starts(mid)) <= num_segments:
+            high = mid
+        else:
+            low = mid + 1
     
-    return len(intersection) / len(union)
\ No newline at end of file
+    starts = segment_starts(low)
+    ends = starts[1:] + [len(paragraphs)]
+    return [("\n\n".join(paragraphs[start:end]), sum(counts[start:end])) for start, end in zip(starts, ends)]
+
+def calculate_similarity(text1, text2):
+    """Calculate Jaccard similarity between two texts based on significant words"""
+    return jaccard(significant_tokens(text1), significant_tokens(text2))
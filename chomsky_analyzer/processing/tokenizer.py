@@ -0,0 +1,113 @@
+import logging
+import re
+
+from config import LLM_TOKENIZER
+
+logger = logging.getLogger(__name__)
+
+# Words and individual punctuation marks, the units the heuristic counts
+_PIECE_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+
+class HeuristicTokenizer:
+    """Offline token estimate: roughly one token per four characters of each word, one per punctuation mark"""
+
+    name = 'heuristic'
+
+    @staticmethod
+    def _piece_tokens(piece):
+        return max(1, (len(piece) + 3) // 4)
+
+    def count(self, text):
+        return sum(self._piece_tokens(piece) for piece in _PIECE_PATTERN.findall(text))
+
+    def truncate(self, text, max_tokens):
+        """Longest prefix of `text` that fits in max_tokens, cut after a whole word"""
+        used = 0
+        for match in _PIECE_PATTERN.finditer(text):
+            used += self._piece_tokens(match.group())
+            if used > max_tokens:
+                return text[:match.start()].rstrip()
+        return text
+
+
+class TiktokenTokenizer:
+    """Exact BPE counts via tiktoken; the encoding must already be in tiktoken's local cache to work offline"""
+
+    name = 'tiktoken'
+
+    def __init__(self, encoding='cl100k_base'):
+        import tiktoken
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def count(self, text):
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text, max_tokens):
+        tokens = self._encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return self._encoding.decode(tokens[:max_tokens])
+
+
+_TOKENIZERS = {
+    'heuristic': HeuristicTokenizer,
+    'tiktoken': TiktokenTokenizer,
+}
+
+_default = None
+
+
+def register_tokenizer(name, factory):
+    """Make a tokenizer available to get_tokenizer(); factory() must return an object with count() and truncate()"""
+    _TOKENIZERS[name] = factory
+
+
+def get_tokenizer(name=None):
+    """Return a tokenizer by name (default config.LLM_TOKENIZER), falling back to the heuristic"""
+    global _default
+    if name is None and _default is not None:
+        return _default
+
+    try:
+        tokenizer = _TOKENIZERS[name or LLM_TOKENIZER]()
+    except Exception as e:
+        logger.warning(f"Tokenizer {name or LLM_TOKENIZER!r} unavailable ({str(e)}), using heuristic counts")
+        tokenizer = HeuristicTokenizer()
+
+    if name is None:
+        _default = tokenizer
+    return tokenizer
+
+
+def split_to_budget(text, max_tokens, tokenizer):
+    """Split text into consecutive pieces of at most max_tokens, preferring sentence boundaries"""
+    if tokenizer.count(text) <= max_tokens:
+        return [text]
+
+    pieces = []
+    current = []
+    current_tokens = 0
+    for sentence in re.split(r'(?<=[.!?])\s+', text):
+        sentence_tokens = tokenizer.count(sentence)
+        if current and current_tokens + sentence_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+            current_tokens = 0
+
+        # A single sentence over budget is cut into word-aligned chunks
+        while sentence_tokens > max_tokens:
+            head = tokenizer.truncate(sentence, max_tokens)
+            if not head:
+                head = sentence.split(None, 1)[0]
+            pieces.append(head)
+            sentence = sentence[len(head):].strip()
+            sentence_tokens = tokenizer.count(sentence)
+
+        if sentence:
+            current.append(sentence)
+            current_tokens += sentence_tokens
+
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
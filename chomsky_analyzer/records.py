@@ -0,0 +1,158 @@
+"""Compact paragraph and Q&A records that share one Article per source article
+
+Parsed paragraphs and generated Q&A pairs are slotted objects pointing at
+a single Article rather than dicts that each carry the article's title,
+date and URL, and records are grouped by that Article instead of by
+rebuilt "title (date)" strings. Item access (pair['question'],
+pair['article_title']) and to_dict() still give the old dict shape for
+JSON output and checkpoints.
+"""
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, Optional
+
+# Old dict keys served from the shared article
+_ARTICLE_FIELDS = {'article_title': 'title', 'article_date': 'date', 'article_url': 'url'}
+
+
+class Article:
+    """Title, date and URL of one source article, shared by all of its records
+
+    Articles are immutable, since they are hashed and used as dict keys.
+    """
+
+    __slots__ = ('title', 'date', 'url')
+
+    def __init__(self, title: str, date: str, url: str):
+        object.__setattr__(self, 'title', title)
+        object.__setattr__(self, 'date', date)
+        object.__setattr__(self, 'url', url)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Article is immutable; cannot set {name!r}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Article is immutable; cannot delete {name!r}")
+
+    def __reduce__(self):
+        # Rebuilt through __init__, since unpickling would otherwise set the slots directly
+        return (Article, self._key())
+
+    def _key(self):
+        return (self.title, self.date, self.url)
+
+    def __eq__(self, other):
+        if not isinstance(other, Article):
+            return NotImplemented
+        return self is other or self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"Article({self.title!r}, {self.date!r}, {self.url!r})"
+
+    def to_dict(self) -> Dict:
+        return {'title': self.title, 'date': self.date, 'url': self.url}
+
+
+class _Record(Mapping):
+    """Read-only mapping view shared by Paragraph and QAPair"""
+
+    __slots__ = ()
+    _fields = ()
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return getattr(self, key)
+        field = _ARTICLE_FIELDS.get(key)
+        if field is None:
+            raise KeyError(key)
+        return getattr(self.article, field)
+
+    def __iter__(self):
+        yield from self._fields
+        yield from _ARTICLE_FIELDS
+
+    def __len__(self):
+        return len(self._fields) + len(_ARTICLE_FIELDS)
+
+    def __contains__(self, key):
+        return key in self._fields or key in _ARTICLE_FIELDS
+
+    def to_dict(self) -> Dict:
+        return {key: self[key] for key in self}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class Paragraph(_Record):
+    """One parsed paragraph and the speaker it is attributed to"""
+
+    __slots__ = ('speaker', 'content', 'article')
+    _fields = ('speaker', 'content')
+
+    def __init__(self, speaker: str, content: str, article: Article):
+        self.speaker = speaker
+        self.content = content
+        self.article = article
+
+
+class QAPair(_Record):
+    """One generated question and answer"""
+
+    __slots__ = ('question', 'answer', 'speaker', 'article')
+    _fields = ('question', 'answer', 'speaker')
+
+    def __init__(self, question: str, answer: str, speaker: str, article: Article):
+        self.question = question
+        self.answer = answer
+        self.speaker = speaker
+        self.article = article
+
+
+def _article(item: Dict, articles: Dict) -> Article:
+    key = (item['article_title'], item['article_date'], item['article_url'])
+    article = articles.get(key)
+    if article is None:
+        article = articles[key] = Article(*key)
+    return article
+
+
+def paragraphs_from_dicts(items: Iterable, articles: Optional[Dict] = None) -> List[Paragraph]:
+    """Paragraph records from old-style dicts (records pass through); equal articles are shared"""
+    articles = {} if articles is None else articles
+    return [
+        item if isinstance(item, Paragraph)
+        else Paragraph(item['speaker'], item['content'], _article(item, articles))
+        for item in items
+    ]
+
+
+def qa_pairs_from_dicts(items: Iterable, articles: Optional[Dict] = None) -> List[QAPair]:
+    """QAPair records from old-style dicts (records pass through); equal articles are shared"""
+    articles = {} if articles is None else articles
+    return [
+        item if isinstance(item, QAPair)
+        else QAPair(item['question'], item['answer'], item['speaker'], _article(item, articles))
+        for item in items
+    ]
+
+
+def group_by_article(records: Iterable) -> Dict[Article, List]:
+    """Records grouped by their article, in order of each article's first record"""
+    groups = {}
+    for record in records:
+        group = groups.get(record.article)
+        if group is None:
+            group = groups[record.article] = []
+        group.append(record)
+    return groups
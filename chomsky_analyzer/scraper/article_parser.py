@@ -1,19 +1,109 @@
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from bs4 import BeautifulSoup, Tag
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import re
 
-def parse_dialogue(html_content: str, url: str) -> List[Dict]:
-    """Parse article content into structured dialogue with better speaker detection"""
-    soup = BeautifulSoup(html_content, 'html.parser')
-    paragraphs = []
+from config import HTML_PARSER
+from records import Article, Paragraph
+
+# Known speakers and the labels that introduce their turns, in priority order:
+# a paragraph belongs to the first speaker with a pattern matching anywhere in it,
+# and that speaker's first matching pattern is the label removed.
+# Patterns must not define named groups; extend with register_speaker().
+SPEAKER_PATTERNS = {
+    'Noam Chomsky': [
+        r'(?:^|\W)(?:Chomsky|NC|Noam):', 
+        r'(?:^|\W)Noam Chomsky:',
+        r'(?:^|\W)Professor Chomsky:'
+    ],
+    'Vijay Prashad': [
+        r'(?:^|\W)(?:Vijay|VP|Prashad):', 
+        r'(?:^|\W)Vijay Prashad:'
+    ],
+    'Interviewer': [
+        r'(?:^|\W)(?:Question|Q|Interviewer):', 
+        r'(?:^|\W)(?:Journalist|Reporter|Host):'
+    ]
+}
+
+class SpeakerMatcher:
+    """All speaker patterns compiled into one alternation with a named group per pattern.
+
+    The alternation finds the leftmost label in a single pass, which is
+    all most paragraphs need. Patterns listed before the one that matched
+    are then tried on their own, so list order decides between several
+    labels in one paragraph.
+    """
+    
+    def __init__(self, speaker_patterns: Dict[str, List[str]]):
+        self._patterns = []
+        alternatives = []
+        for speaker, patterns in speaker_patterns.items():
+            for pattern in patterns:
+                alternatives.append(f"(?P<s{len(alternatives)}>{pattern})")
+                self._patterns.append((speaker, re.compile(pattern)))
+        self._regex = re.compile('|'.join(alternatives)) if alternatives else None
+    
+    def match(self, text: str) -> Tuple[Optional[str], str]:
+        """Return (speaker, text without its label), or (None, text) if unlabeled."""
+        if self._regex is None:
+            return None, text
+        match = self._regex.search(text)
+        if not match:
+            return None, text
+        index = int(match.lastgroup[1:])
+        speaker = self._patterns[index][0]
+        for earlier_speaker, regex in self._patterns[:index]:
+            earlier = regex.search(text)
+            if earlier:
+                speaker, match = earlier_speaker, earlier
+                break
+        return speaker, (text[:match.start()] + text[match.end():]).strip()
+
+_matcher = None
+
+def get_speaker_matcher() -> SpeakerMatcher:
+    """Matcher for SPEAKER_PATTERNS, compiled once and rebuilt after registration."""
+    global _matcher
+    if _matcher is None:
+        _matcher = SpeakerMatcher(SPEAKER_PATTERNS)
+    return _matcher
+
+def register_speaker(speaker: str, patterns: List[str]):
+    """Add label patterns for a speaker, e.g. a new interview partner."""
+    global _matcher
+    SPEAKER_PATTERNS.setdefault(speaker, []).extend(patterns)
+    _matcher = None
+
+def parse_dialogue(html_content: Union[str, Tag], url: str, parser: str = HTML_PARSER,
+                   speaker_patterns: Optional[Dict[str, List[str]]] = None) -> List[Paragraph]:
+    """Parse article content into structured dialogue with better speaker detection
+
+    Accepts either an HTML string or the already parsed content element
+    returned by extract_article_content(..., keep_tree=True), which avoids
+    serializing and re-parsing the article. Every paragraph refers to the
+    same Article record.
+    """
+    return list(iter_dialogue(html_content, url, parser, speaker_patterns))
+
+def iter_dialogue(html_content: Union[str, Tag], url: str, parser: str = HTML_PARSER,
+                  speaker_patterns: Optional[Dict[str, List[str]]] = None) -> Iterator[Paragraph]:
+    """Streaming form of parse_dialogue that yields paragraph records as they are parsed"""
+    if isinstance(html_content, Tag):
+        # The fetcher already chose the content container with the same selectors
+        soup = html_content
+        content_div = html_content
+    else:
+        soup = BeautifulSoup(html_content, parser)
+        content_div = soup.find('div', class_='post-content')
     
     # Extract title and date
-    title = soup.find('h1').text.strip() if soup.find('h1') else "Untitled Article"
+    title_tag = soup.find('h1')
+    title = title_tag.text.strip() if title_tag else "Untitled Article"
     date_tag = soup.find('time')
     date = date_tag['datetime'] if date_tag and date_tag.has_attr('datetime') else "Unknown Date"
+    article = Article(title, date, url)
     
     # Detect interview vs. solo article format
-    content_div = soup.find('div', class_='post-content')
     if not content_div:
         # Try other common content containers
         for selector in ['.entry-content', 'article', '.article-content', '.content', 'main']:
@@ -26,37 +116,17 @@ def parse_dialogue(html_content: str, url: str) -> List[Dict]:
             content_div = soup.find('body')
     
     if not content_div:
-        return paragraphs
+        return
     
     # Extract all paragraphs from content
     all_paragraphs = content_div.find_all(['p', 'h2', 'h3', 'h4'])
     
-    # List of known speakers and their patterns
-    speaker_patterns = {
-        'Noam Chomsky': [
-            r'(?:^|\W)(?:Chomsky|NC|Noam):', 
-            r'(?:^|\W)Noam Chomsky:',
-            r'(?:^|\W)Professor Chomsky:'
-        ],
-        'Vijay Prashad': [
-            r'(?:^|\W)(?:Vijay|VP|Prashad):', 
-            r'(?:^|\W)Vijay Prashad:'
-        ],
-        'Interviewer': [
-            r'(?:^|\W)(?:Question|Q|Interviewer):', 
-            r'(?:^|\W)(?:Journalist|Reporter|Host):'
-        ]
-    }
+    matcher = get_speaker_matcher() if speaker_patterns is None else SpeakerMatcher(speaker_patterns)
     
-    # Check if this appears to be an interview
-    content_text = ' '.join([p.get_text() for p in all_paragraphs])
-    is_interview = any(re.search(pattern, content_text) 
-                      for patterns in speaker_patterns.values() 
-                      for pattern in patterns)
-    
-    # For solo articles, treat everything as Chomsky
+    # Solo articles never match a speaker label, so everything stays with the default speaker
     default_speaker = 'Noam Chomsky'
     current_speaker = default_speaker
+    default_speaker_seen = False
     
     # Process each paragraph
     for element in all_paragraphs:
@@ -64,45 +134,16 @@ def parse_dialogue(html_content: str, url: str) -> List[Dict]:
         if not text:
             continue
             
-        # Try to identify speaker from text
-        speaker_found = False
-        for speaker, patterns in speaker_patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, text)
-                if match:
-                    current_speaker = speaker
-                    # Remove speaker prefix from text
-                    text = re.sub(pattern, '', text, 1).strip()
-                    speaker_found = True
-                    break
-            if speaker_found:
-                break
-        
-        # For solo articles, assume everything is by the default speaker
-        if not is_interview and not speaker_found:
-            current_speaker = default_speaker
-            
-        # Always add content, even if no speaker is identified
-        if not speaker_found and is_interview:
-            # In an interview but no speaker tag - use previous speaker
-            pass
+        # Identify and strip the speaker label in a single search; unlabeled
+        # paragraphs in an interview keep the previous speaker
+        speaker, text = matcher.match(text)
+        if speaker:
+            current_speaker = speaker
+        if current_speaker == default_speaker:
+            default_speaker_seen = True
         
-        paragraphs.append({
-            'speaker': current_speaker,
-            'content': text,
-            'article_title': title,
-            'article_date': date,
-            'article_url': url
-        })
+        yield Paragraph(current_speaker, text, article)
         
-    # If no paragraphs were processed with speakers, create a default entry
-    if not paragraphs or all(p.get('speaker') != 'Noam Chomsky' for p in paragraphs):
-        paragraphs.append({
-            'speaker': 'Noam Chomsky',
-            'content': content_div.get_text(strip=True),
-            'article_title': title,
-            'article_date': date,
-            'article_url': url
-        })
-    
-    return paragraphs
\ No newline at end of file
+    # If no paragraphs were attributed to Chomsky, fall back to the whole text
+    if not default_speaker_seen:
+        yield Paragraph(default_speaker, content_div.get_text(strip=True), article)
\ No newline at end of file
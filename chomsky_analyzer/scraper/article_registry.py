@@ -0,0 +1,131 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from config import REGISTRY_DB_PATH
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url TEXT PRIMARY KEY,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    content_hash TEXT,
+    parse_status TEXT NOT NULL DEFAULT 'pending',
+    qa_status TEXT NOT NULL DEFAULT 'pending',
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_first_seen ON articles (first_seen);
+"""
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ArticleRegistry:
+    """SQLite-backed record of discovered articles and their processing state."""
+
+    def __init__(self, db_path=REGISTRY_DB_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def add_urls(self, urls):
+        """Register discovered URLs and return the ones never seen before, in order."""
+        now = time.time()
+        new_urls = []
+        with self._lock, self._conn:
+            for url in urls:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO articles (url, first_seen, last_seen, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (url, now, now, now),
+                )
+                if cursor.rowcount:
+                    new_urls.append(url)
+                else:
+                    self._conn.execute("UPDATE articles SET last_seen = ? WHERE url = ?", (now, url))
+        return new_urls
+
+    def record_content(self, url, text):
+        """Store the hash of fetched content; returns True if it is new or changed.
+
+        A changed hash resets the parse and QA status so the article is
+        picked up again by incremental runs.
+        """
+        digest = content_hash(text)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT content_hash FROM articles WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO articles (url, first_seen, last_seen, content_hash, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, now, now, digest, now),
+                )
+                return True
+            if row['content_hash'] == digest:
+                return False
+            self._conn.execute(
+                "UPDATE articles SET content_hash = ?, parse_status = ?, qa_status = ?, updated_at = ? "
+                "WHERE url = ?",
+                (digest, PENDING, PENDING, now, url),
+            )
+            return True
+
+    def set_parse_status(self, url, status):
+        self._set_status(url, 'parse_status', status)
+
+    def set_qa_status(self, url, status):
+        self._set_status(url, 'qa_status', status)
+
+    def _set_status(self, url, column, status):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE articles SET {column} = ?, updated_at = ? WHERE url = ?",
+                (status, time.time(), url),
+            )
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM articles WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def is_done(self, url):
+        row = self.get(url)
+        return row is not None and row['qa_status'] == DONE
+
+    def pending_urls(self, urls=None):
+        """URLs whose QA stage has not completed, oldest discoveries first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM articles WHERE qa_status != ? ORDER BY first_seen, url", (DONE,)
+            ).fetchall()
+        pending = [row['url'] for row in rows]
+        if urls is not None:
+            wanted = set(urls)
+            pending = [url for url in pending if url in wanted]
+        return pending
+
+    def urls(self):
+        """All known URLs, oldest discoveries first."""
+        with self._lock:
+            rows = self._conn.execute("SELECT url FROM articles ORDER BY first_seen, url").fetchall()
+        return [row['url'] for row in rows]
@@ -1,85 +1,172 @@
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import logging
 import re
 import time
-import random
-from urllib.parse import urljoin
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlparse
+
+from scraper.http_cache import cached_get
+from config import (
+    SCRAPER_REQUESTS_PER_SECOND,
+    SCRAPER_BURST,
+    SCRAPER_MAX_WORKERS,
+    SCRAPER_INDEX_TIMEOUT,
+    SCRAPER_ARTICLE_TIMEOUT,
+    HTTP_INDEX_CACHE_TTL,
+    HTML_PARSER,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    """Token-bucket politeness limiter with one bucket per host."""
+
+    def __init__(self, rate=SCRAPER_REQUESTS_PER_SECOND, burst=SCRAPER_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        """Block until a request to the host of `url` is allowed."""
+        host = urlparse(url).netloc
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, last = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - last) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+# Shared limiter so single calls and batch calls respect the same budget
+_rate_limiter = HostRateLimiter()
+
+# Tags and classes extract_article_content reads for title, date and content
+_STRAINED_TAGS = {'h1', 'time', 'meta', 'article', 'main'}
+_STRAINED_CLASSES = {
+    'post-content', 'entry-content', 'article-content', 'content',
+    'article-title', 'post-date', 'entry-date', 'date',
+}
+
+
+class ContentStrainer(SoupStrainer):
+    """Only build the elements that hold an article's title, date and content."""
+
+    def _wanted(self, name, attrs):
+        if name in _STRAINED_TAGS:
+            return True
+        classes = (attrs or {}).get('class') or ()
+        if isinstance(classes, str):
+            classes = classes.split()
+        return any(cls in _STRAINED_CLASSES for cls in classes)
+
+    # beautifulsoup4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self._wanted(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+    # beautifulsoup4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return markup_name if self._wanted(markup_name, markup_attrs) else None
+
+# Headers used when requesting index, sitemap and listing pages
+INDEX_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+def get_rate_limiter():
+    """Return the shared per-host limiter used by all scraper requests."""
+    return _rate_limiter
+
+def extract_links_from_soup(soup, page_url):
+    """Find article links on a parsed listing page using a cascade of heuristics."""
+    article_links = []
+    
+    # Try multiple selector patterns to find articles
+    article_containers = soup.select('.post-list article, article.post, .articles-list .article, .entry')
+    if not article_containers:
+        # If specific containers aren't found, look for any links that might be articles
+        for a_tag in soup.find_all('a', href=True):
+            href = a_tag['href']
+            # Look for date patterns in URLs which often indicate articles
+            if re.search(r'/\d{8}/', href) or re.search(r'/\d{6}/', href) or re.search(r'/\d{4}/\d{2}/\d{2}/', href):
+                article_links.append(urljoin(page_url, href))
+    else:
+        for container in article_containers:
+            links = container.find_all('a', href=True)
+            for link in links:
+                article_links.append(urljoin(page_url, link['href']))
+    
+    # If still no links found, try a more general approach
+    if not article_links:
+        # Look for links in any list-like structure
+        list_items = soup.find_all('li')
+        for li in list_items:
+            links = li.find_all('a', href=True)
+            for link in links:
+                href = link['href']
+                # Check if it looks like an article URL (contains a date or specific pattern)
+                if ('chomsky.info' in href and not href.endswith('.jpg') and not href.endswith('.png')):
+                    article_links.append(urljoin(page_url, href))
+    
+    # Last resort: get any link that looks like a Chomsky article
+    if not article_links:
+        all_links = soup.find_all('a', href=True)
+        for link in all_links:
+            href = link['href']
+            # Match patterns like /20200826/ which are common in Chomsky's articles
+            if re.search(r'/\d{8}/', href) or re.search(r'/\d{6}/', href):
+                article_links.append(urljoin(page_url, href))
+    
+    # Remove duplicates (keeping page order) and non-article links
+    article_links = list(dict.fromkeys(article_links))
+    return [link for link in article_links if 'chomsky.info' in link and '#' not in link]
 
 def get_all_article_links(main_url):
     """Get all article links from the Chomsky.info articles page with improved scraping."""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-    }
-    
     try:
-        response = requests.get(main_url, headers=headers, timeout=10)
+        response = cached_get(main_url, headers=INDEX_HEADERS, timeout=SCRAPER_INDEX_TIMEOUT,
+                              ttl=HTTP_INDEX_CACHE_TTL)
         response.raise_for_status()  # Check for HTTP errors
         
         soup = BeautifulSoup(response.content, 'html.parser')
-        article_links = []
-        
-        # Try multiple selector patterns to find articles
-        article_containers = soup.select('.post-list article, article.post, .articles-list .article, .entry')
-        if not article_containers:
-            # If specific containers aren't found, look for any links that might be articles
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
-                # Look for date patterns in URLs which often indicate articles
-                if re.search(r'/\d{8}/', href) or re.search(r'/\d{6}/', href) or re.search(r'/\d{4}/\d{2}/\d{2}/', href):
-                    article_links.append(urljoin(main_url, href))
-        else:
-            for container in article_containers:
-                links = container.find_all('a', href=True)
-                for link in links:
-                    article_links.append(urljoin(main_url, link['href']))
-        
-        # If still no links found, try a more general approach
-        if not article_links:
-            # Look for links in any list-like structure
-            list_items = soup.find_all('li')
-            for li in list_items:
-                links = li.find_all('a', href=True)
-                for link in links:
-                    href = link['href']
-                    # Check if it looks like an article URL (contains a date or specific pattern)
-                    if ('chomsky.info' in href and not href.endswith('.jpg') and not href.endswith('.png')):
-                        article_links.append(urljoin(main_url, href))
-        
-        # Last resort: get any link that looks like a Chomsky article
-        if not article_links:
-            all_links = soup.find_all('a', href=True)
-            for link in all_links:
-                href = link['href']
-                # Match patterns like /20200826/ which are common in Chomsky's articles
-                if re.search(r'/\d{8}/', href) or re.search(r'/\d{6}/', href):
-                    article_links.append(urljoin(main_url, href))
-        
-        # Remove duplicates and non-article links
-        article_links = list(set(article_links))
-        article_links = [link for link in article_links if 'chomsky.info' in link and '#' not in link]
-        
-        return article_links
+        return extract_links_from_soup(soup, main_url)
     
     except Exception as e:
-        print(f"Error fetching article links: {str(e)}")
+        logger.warning(f"Error fetching article links: {str(e)}")
         return []
 
-def extract_article_content(url):
-    """Extract content from an article page with improved robustness."""
+def extract_article_content(url, rate_limiter=None, parser=HTML_PARSER, keep_tree=False):
+    """Extract content from an article page with improved robustness.
+
+    With keep_tree, the parsed content element is returned as 'content_node'
+    for parse_dialogue instead of being serialized into 'html_content'.
+    """
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     }
     
     try:
-        # Add a small delay to avoid overloading the server
-        time.sleep(random.uniform(0.5, 1.5))
-        
-        response = requests.get(url, headers=headers, timeout=15)
+        # Cache hits skip the network; otherwise wait for the per-host token
+        # bucket to avoid overloading the server
+        limiter = rate_limiter or _rate_limiter
+        response = cached_get(url, headers=headers, timeout=SCRAPER_ARTICLE_TIMEOUT,
+                              before_request=limiter.acquire)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        # Only build the title, date and content elements rather than the whole page
+        soup = BeautifulSoup(response.content, parser, parse_only=ContentStrainer())
         
         # Try different selectors for title
         title = None
@@ -127,26 +214,75 @@ def extract_article_content(url):
         
         if not content:
             # If no specific content container found, use the body and remove headers/footers
+            soup = BeautifulSoup(response.content, parser)
             content = soup.find('body')
             # Remove navigation, header, footer, etc.
             for elem in content.select('nav, header, footer, .sidebar, .navigation, .comments'):
                 if elem:
                     elem.decompose()
         
-        return {
+        result = {
             'title': title,
             'date': date,
             'content': content.get_text('\n', strip=True) if content else "",
-            'html_content': str(content) if content else "",
+            'html_content': "",
             'url': url
         }
+        if keep_tree:
+            result['content_node'] = content
+        else:
+            result['html_content'] = str(content) if content else ""
+        return result
     
     except Exception as e:
-        print(f"Error extracting content from {url}: {str(e)}")
+        logger.warning(f"Error extracting content from {url}: {str(e)}")
         return {
             'title': "Error Extracting Content",
             'date': "Unknown Date",
             'content': f"Error occurred: {str(e)}",
             'html_content': "",
-            'url': url
-        }
\ No newline at end of file
+            'url': url,
+            'error': str(e)
+        }
+
+def extract_articles(urls, max_workers=SCRAPER_MAX_WORKERS, rate_limiter=None,
+                     registry=None, only_changed=False, keep_tree=False):
+    """Fetch several articles concurrently, yielding results in completion order.
+
+    `urls` may be a generator such as discover_article_links(); URLs are
+    taken from it only as fetch slots free up, so fetching starts as soon
+    as the first links arrive and nothing far past what the caller
+    consumes is requested. With a registry, each fetched article's content
+    hash is recorded; with only_changed, articles whose content is
+    unchanged since a completed run are not yielded.
+    """
+    limiter = rate_limiter or _rate_limiter
+    urls = iter(urls)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+
+        def submit_next():
+            for url in urls:
+                pending.add(executor.submit(extract_article_content, url, limiter, keep_tree=keep_tree))
+                return
+
+        # Keep a second batch queued so workers stay busy while the caller handles results
+        for _ in range(2 * max_workers):
+            submit_next()
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    submit_next()
+                    content = future.result()
+                    if registry is not None and 'error' not in content:
+                        done_before = registry.is_done(content['url'])
+                        changed = registry.record_content(content['url'], content['content'])
+                        if only_changed and done_before and not changed:
+                            continue
+                    yield content
+        finally:
+            # Don't start fetches nobody will consume if the caller stops early
+            for future in pending:
+                future.cancel()
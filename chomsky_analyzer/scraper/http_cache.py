@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import http_client
+from config import HTTP_CACHE_DIR, HTTP_CACHE_TTL, HTTP_CACHE_MAX_BYTES
+
+
+class CachedResponse:
+    """Minimal response object for bodies served from the on-disk cache."""
+
+    status_code = 200
+
+    def __init__(self, url, content, meta):
+        self.url = url
+        self.content = content
+        self.headers = {
+            'ETag': meta.get('etag'),
+            'Last-Modified': meta.get('last_modified'),
+            'Content-Type': meta.get('content_type'),
+        }
+        self.from_cache = True
+
+    def raise_for_status(self):
+        pass
+
+
+class ResponseCache:
+    """Persistent URL-keyed response cache with conditional revalidation."""
+
+    def __init__(self, cache_dir=HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_dir, key)
+        return base + '.json', base + '.body'
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _write_meta(self, meta_path, meta):
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def _scan_size(self):
+        total = 0
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.body'):
+                total += entry.stat().st_size
+        return total
+
+    def _store(self, url, response):
+        meta_path, body_path = self._paths(url)
+        meta = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_type': response.headers.get('Content-Type'),
+            'stored_at': time.time(),
+        }
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            if os.path.exists(body_path):
+                self._total_bytes -= os.path.getsize(body_path)
+
+            tmp_path = body_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(response.content)
+            os.replace(tmp_path, body_path)
+            self._write_meta(meta_path, meta)
+
+            self._total_bytes += len(response.content)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes."""
+        bodies = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.body'):
+                stat = entry.stat()
+                bodies.append((stat.st_mtime, stat.st_size, entry.path))
+        bodies.sort()
+
+        for _, size, body_path in bodies:
+            if self._total_bytes <= self.max_bytes:
+                break
+            meta_path = body_path[:-len('.body')] + '.json'
+            for path in (body_path, meta_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes -= size
+
+    def get(self, url, headers=None, timeout=None, before_request=None, ttl=None):
+        """GET `url`, serving fresh or 304-validated responses from disk.
+
+        `before_request(url)` runs only when the network is actually hit, so
+        politeness limits are not spent on fresh cache hits. `ttl` overrides
+        the cache's freshness lifetime; 0 always sends a conditional GET.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        meta, body = self._load(url)
+        meta_path, body_path = self._paths(url)
+
+        if meta is not None:
+            # Mark the entry as recently used for LRU eviction
+            try:
+                os.utime(body_path)
+            except OSError:
+                pass
+
+            if time.time() - meta['stored_at'] < ttl:
+                self.hits += 1
+                return CachedResponse(url, body, meta)
+
+            request_headers = dict(headers or {})
+            if meta.get('etag'):
+                request_headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                request_headers['If-Modified-Since'] = meta['last_modified']
+        else:
+            request_headers = headers
+
+        if before_request is not None:
+            before_request(url)
+        response = http_client.get(url, headers=request_headers, timeout=timeout)
+
+        if response.status_code == 304 and meta is not None:
+            self.revalidated += 1
+            meta['stored_at'] = time.time()
+            with self._lock:
+                self._write_meta(meta_path, meta)
+            return CachedResponse(url, body, meta)
+
+        self.misses += 1
+        if response.status_code == 200:
+            self._store(url, response)
+        response.from_cache = False
+        return response
+
+    def stats(self):
+        return {'hits': self.hits, 'revalidated': self.revalidated, 'misses': self.misses}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the process-wide ResponseCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def configure_cache(cache_dir=HTTP_CACHE_DIR, ttl=HTTP_CACHE_TTL, max_bytes=HTTP_CACHE_MAX_BYTES):
+    """Replace the process-wide cache, e.g. to point it at another directory."""
+    global _cache
+    with _cache_lock:
+        _cache = ResponseCache(cache_dir, ttl, max_bytes)
+        return _cache
+
+
+def cached_get(url, headers=None, timeout=None, before_request=None, ttl=None):
+    return get_cache().get(url, headers=headers, timeout=timeout, before_request=before_request, ttl=ttl)
@@ -0,0 +1,139 @@
+import gzip
+import logging
+import re
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urlparse, urlunparse
+
+from bs4 import BeautifulSoup
+
+from scraper.content_fetcher import INDEX_HEADERS, extract_links_from_soup, get_rate_limiter
+from scraper.http_cache import cached_get
+from config import SCRAPER_INDEX_TIMEOUT, SCRAPER_MAX_WORKERS, DISCOVERY_MAX_PAGES, HTTP_INDEX_CACHE_TTL
+
+logger = logging.getLogger(__name__)
+
+# Index pagination styles: /articles/page/2/, ?page=2 and WordPress ?paged=2
+PAGINATION_PATTERN = re.compile(r'/page/\d+/?$|[?&](?:page|paged)=\d+')
+ARTICLE_URL_PATTERN = re.compile(r'/\d{8}/|/\d{6}/|/\d{4}/\d{2}/\d{2}/')
+SKIPPED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.pdf', '.mp3', '.xml')
+
+
+def normalize_url(url):
+    """Canonical form used for deduplication: lowercase host, no www, fragment or default port."""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower() or 'https'
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parsed.port and not ((scheme == 'http' and parsed.port == 80) or (scheme == 'https' and parsed.port == 443)):
+        host = f"{host}:{parsed.port}"
+
+    path = re.sub(r'/{2,}', '/', parsed.path or '/')
+    last_segment = path.rsplit('/', 1)[-1]
+    if '.' not in last_segment and not path.endswith('/'):
+        path += '/'
+
+    return urlunparse((scheme, host, path, '', parsed.query, ''))
+
+
+def _same_site(url, host):
+    return (urlparse(url).hostname or '').lower().replace('www.', '', 1) == host
+
+
+def _is_article_url(url, host):
+    return (_same_site(url, host)
+            and ARTICLE_URL_PATTERN.search(url) is not None
+            and not url.lower().endswith(SKIPPED_EXTENSIONS))
+
+
+def _fetch(url):
+    # Listings change whenever an article is published, so always revalidate them;
+    # the rate limit is only spent when the request actually goes out
+    response = cached_get(url, headers=INDEX_HEADERS, timeout=SCRAPER_INDEX_TIMEOUT,
+                          before_request=get_rate_limiter().acquire, ttl=HTTP_INDEX_CACHE_TTL)
+    response.raise_for_status()
+    return response.content
+
+
+def _crawl_index_page(url, host):
+    """Return (article links, further index pages) found on one listing page."""
+    soup = BeautifulSoup(_fetch(url), 'html.parser')
+    articles = extract_links_from_soup(soup, url)
+
+    pages = []
+    for link in soup.find_all(['a', 'link'], href=True):
+        href = urljoin(url, link['href'])
+        rel = link.get('rel') or []
+        if 'next' in rel or PAGINATION_PATTERN.search(href):
+            if _same_site(href, host):
+                pages.append(href)
+    return articles, pages
+
+
+def _crawl_sitemap(url, host):
+    """Return (article links, child sitemaps) listed in a sitemap or sitemap index."""
+    content = _fetch(url)
+    if content[:2] == b'\x1f\x8b':
+        content = gzip.decompress(content)
+    root = ET.fromstring(content)
+
+    locations = [elem.text.strip() for elem in root.iter() if elem.tag.endswith('loc') and elem.text]
+    if root.tag.endswith('sitemapindex'):
+        return [], locations
+    return [loc for loc in locations if _is_article_url(loc, host)], []
+
+
+def discover_article_links(base_url, max_pages=DISCOVERY_MAX_PAGES, max_workers=SCRAPER_MAX_WORKERS,
+                           include_sitemap=True):
+    """Yield normalized, deduplicated article URLs as they are discovered.
+
+    Paginated index pages and the site's sitemap are crawled concurrently;
+    each newly found link is yielded immediately so processing can start
+    before discovery finishes. At most `max_pages` index and sitemap pages
+    are fetched.
+    """
+    host = (urlparse(base_url).hostname or '').lower().replace('www.', '', 1)
+    parsed = urlparse(base_url)
+    seen_links = set()
+    seen_pages = set()
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def schedule(kind, url):
+            key = normalize_url(url)
+            if key in seen_pages or len(seen_pages) >= max_pages:
+                return
+            seen_pages.add(key)
+            crawl = _crawl_sitemap if kind == 'sitemap' else _crawl_index_page
+            pending[executor.submit(crawl, url, host)] = (kind, url)
+
+        schedule('index', base_url)
+        if include_sitemap:
+            schedule('sitemap', f"{parsed.scheme}://{parsed.netloc}/sitemap.xml")
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, url = pending.pop(future)
+                    try:
+                        links, more_pages = future.result()
+                    except Exception as e:
+                        logger.warning(f"Error discovering links from {url}: {str(e)}")
+                        continue
+
+                    for page in more_pages:
+                        schedule(kind, page)
+
+                    for link in links:
+                        if PAGINATION_PATTERN.search(link):
+                            continue
+                        normalized = normalize_url(link)
+                        if normalized not in seen_links:
+                            seen_links.add(normalized)
+                            yield normalized
+        finally:
+            # Stop crawling pages nobody will consume if the caller stops early
+            for future in pending:
+                future.cancel()
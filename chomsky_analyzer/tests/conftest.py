@@ -0,0 +1,94 @@
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Modules import each other from the chomsky_analyzer directory (e.g. `from config import ...`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Keep caches, registries and checkpoints written during the tests out of the user's cache
+os.environ.setdefault('CHOMSKY_CACHE_DIR', tempfile.mkdtemp(prefix='chomsky-tests-'))
+# Every LLM request reaches the mock server, so request counts are exact
+os.environ.setdefault('CHOMSKY_LLM_CACHE_BYPASS', '1')
+
+
+class StubSite:
+    """Local HTTP server serving canned pages and recording every request it gets."""
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site.requests.append((self.path, dict(self.headers)))
+                page = site.pages.get(self.path)
+                if page is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                etag = page.get('etag')
+                if etag and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                data = page['body'].encode('utf-8')
+                self.send_response(page.get('status', 200))
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                if etag:
+                    self.send_header('ETag', etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+
+    def add(self, path, body, **options):
+        self.pages[path] = dict(options, body=body)
+        return self.url(path)
+
+    def hits(self, path):
+        return [headers for requested, headers in self.requests if requested == path]
+
+
+@pytest.fixture(autouse=True)
+def no_politeness_delay(monkeypatch):
+    """Tests only talk to local servers, so the per-host scraper limiter need not slow them down"""
+    from scraper import content_fetcher
+
+    monkeypatch.setattr(content_fetcher, '_rate_limiter', content_fetcher.HostRateLimiter(rate=1000, burst=1000))
+
+
+@pytest.fixture
+def site():
+    stub = StubSite()
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+@pytest.fixture
+def mock_llm():
+    """The mock completions server on a free port; mock_llm.backend points at it, unthrottled"""
+    from processing.llm_backend import LLMBackend
+    from processing.mock_llm_server import start_mock_server
+
+    server = start_mock_server(port=0, retry_after=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    server.backend = LLMBackend('mock', url, 'mock-llm')
+    yield server
+    server.shutdown()
+    server.server_close()
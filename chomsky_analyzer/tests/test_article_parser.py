@@ -0,0 +1,39 @@
+"""SpeakerMatcher must pick the same speaker and strip the same label as trying each pattern in list order"""
+import random
+import re
+
+import pytest
+
+from scraper.article_parser import SPEAKER_PATTERNS, SpeakerMatcher
+
+PIECES = [
+    "Chomsky:", "NC:", "Noam Chomsky:", "Professor Chomsky:", "Vijay:", "VP:", "Vijay Prashad:",
+    "Q:", "Question:", "Host:", "Reporter:", "Chomsky", "Q", ":", " ", "-", "words", "the state",
+]
+
+
+def list_order_match(text):
+    """The per-pattern loop the compiled matcher replaced"""
+    for speaker, patterns in SPEAKER_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, text):
+                return speaker, re.sub(pattern, '', text, 1).strip()
+    return None, text
+
+
+@pytest.mark.parametrize("text, speaker", [
+    ("Chomsky: Yes.", "Noam Chomsky"),
+    ("Q: What did Chomsky: say?", "Noam Chomsky"),
+    ("Host: Welcome, VP: thanks", "Vijay Prashad"),
+    ("No label here", None),
+])
+def test_list_order_decides_between_labels(text, speaker):
+    assert SpeakerMatcher(SPEAKER_PATTERNS).match(text) == list_order_match(text)
+    assert SpeakerMatcher(SPEAKER_PATTERNS).match(text)[0] == speaker
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_paragraphs_match_list_order(seed):
+    rng = random.Random(seed)
+    text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 8)))
+    assert SpeakerMatcher(SPEAKER_PATTERNS).match(text) == list_order_match(text), repr(text)
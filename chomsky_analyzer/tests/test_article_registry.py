@@ -0,0 +1,57 @@
+"""ArticleRegistry must remember discovered articles, their content and their processing state"""
+import pytest
+
+from scraper.article_registry import DONE, FAILED, PENDING, ArticleRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ArticleRegistry(str(tmp_path / 'articles.db'))
+    yield registry
+    registry.close()
+
+
+def test_add_urls_returns_only_new_urls_in_order(registry):
+    assert registry.add_urls(['b', 'a']) == ['b', 'a']
+    assert registry.add_urls(['a', 'c', 'b']) == ['c']
+    assert registry.urls() == ['a', 'b', 'c']
+    assert registry.get('c')['parse_status'] == PENDING
+
+
+def test_changed_content_resets_the_processing_state(registry):
+    registry.add_urls(['a'])
+    assert registry.record_content('a', 'text')
+    registry.set_parse_status('a', DONE)
+    registry.set_qa_status('a', DONE)
+    assert not registry.record_content('a', 'text')
+    assert registry.is_done('a')
+
+    assert registry.record_content('a', 'new text')
+    assert not registry.is_done('a')
+    assert registry.get('a')['parse_status'] == PENDING
+
+
+def test_content_of_unknown_urls_is_recorded(registry):
+    assert registry.record_content('new', 'text')
+    assert registry.urls() == ['new']
+
+
+def test_pending_urls_include_failed_articles(registry):
+    registry.add_urls(['a', 'b', 'c'])
+    registry.set_qa_status('a', DONE)
+    registry.set_qa_status('b', FAILED)
+    assert registry.pending_urls() == ['b', 'c']
+    assert registry.pending_urls(['c', 'a', 'x']) == ['c']
+
+
+def test_state_survives_reopening(tmp_path):
+    path = str(tmp_path / 'articles.db')
+    registry = ArticleRegistry(path)
+    registry.add_urls(['a'])
+    registry.set_qa_status('a', DONE)
+    registry.close()
+
+    registry = ArticleRegistry(path)
+    assert registry.is_done('a')
+    assert registry.add_urls(['a']) == []
+    registry.close()
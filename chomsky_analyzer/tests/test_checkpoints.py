@@ -0,0 +1,94 @@
+"""Checkpoints must round-trip article progress, and failed articles must be generated again on resume"""
+import pytest
+
+from checkpoints import COMPLETE, RUNNING, CheckpointStore
+from pipeline import process_articles
+from records import Article, Paragraph, QAPair
+
+URL = "https://chomsky.info/20200101/"
+ARTICLE = (
+    "<html><body><h1>Title</h1><div class='post-content'>"
+    + "".join(f"<p>Q: Question {i} about power?</p><p>Chomsky: {'The media and the state. ' * 30}</p>" for i in range(3))
+    + "</div></body></html>"
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.db'))
+    yield store
+    store.close()
+
+
+def _result(pairs):
+    return {
+        'url': URL, 'title': "Title", 'paragraphs': 2, 'speakers': {"Noam Chomsky", "Interviewer"},
+        'qa_pairs': pairs, 'skipped': False, 'resumed': False, 'error': None, 'traceback': "unused",
+    }
+
+
+def test_unfinished_runs_resume_and_complete_ones_start_over(store):
+    run = store.start_run('run', {'limit': 2})
+    assert not run.resumed
+    run.save_paragraphs(URL, "Title", [])
+
+    run = store.start_run('run', {'limit': 2})
+    assert run.resumed and URL in run.load()
+
+    run.finish()
+    run = store.start_run('run', {'limit': 2})
+    assert not run.resumed and run.load() == {}
+
+
+def test_restart_discards_checkpoints(store):
+    store.start_run('run').save_paragraphs(URL, "Title", [])
+    run = store.start_run('run', resume=False)
+    assert not run.resumed and run.load() == {}
+
+
+def test_paragraphs_and_results_round_trip_sharing_one_article(store):
+    article = Article("Title", "2020-01-01", URL)
+    paragraphs = [Paragraph("Noam Chomsky", "Text", article), Paragraph("Interviewer", "Question?", article)]
+    pairs = [QAPair("Why?", "Because.", "Noam Chomsky", article), QAPair("How?", "Thus.", "Noam Chomsky", article)]
+    run = store.start_run('run')
+
+    run.save_paragraphs(URL, "Title", paragraphs)
+    state = run.load()[URL]
+    assert state['title'] == "Title" and state['result'] is None
+    assert state['paragraphs'] == paragraphs
+    assert state['paragraphs'][0].article is state['paragraphs'][1].article
+
+    run.save_result(URL, _result(pairs))
+    state = run.load()[URL]
+    assert state['paragraphs'] is None
+    result = state['result']
+    assert result['qa_pairs'] == pairs and result['qa_pairs'][0].article is result['qa_pairs'][1].article
+    assert result['speakers'] == {"Noam Chomsky", "Interviewer"}
+    assert result['traceback'] is None
+
+
+def test_runs_report_their_progress(store):
+    run = store.start_run('run', {'limit': 2})
+    run.save_paragraphs(URL, "Title", [])
+    run.save_result("https://chomsky.info/20200102/", dict(_result([]), url="https://chomsky.info/20200102/"))
+    assert [(r['run_id'], r['status'], r['articles'], r['finished']) for r in store.runs()] == [('run', RUNNING, 2, 1)]
+    run.finish()
+    assert store.runs()[0]['status'] == COMPLETE
+
+
+def test_failed_articles_are_generated_again_on_resume(site, mock_llm, store):
+    url = site.add('/chomsky.info/20200101/', ARTICLE)
+    mock_llm.state.error_rate = 1.0
+    mock_llm.state.error_status = 400
+    results = list(process_articles([url], checkpoint=store.start_run('run'), backend=mock_llm.backend))
+    assert results[0]['error']
+    assert store.load('run')[url]['result'] is None
+
+    mock_llm.state.error_rate = 0.0
+    run = store.start_run('run')
+    assert run.resumed
+    results = list(process_articles([url], checkpoint=run, backend=mock_llm.backend))
+    assert results[0]['error'] is None and results[0]['qa_pairs']
+    assert store.load('run')[url]['result']['qa_pairs'] == results[0]['qa_pairs']
+    # Generated from the checkpointed paragraphs, without fetching the article again
+    assert len(site.hits('/chomsky.info/20200101/')) == 1
@@ -0,0 +1,64 @@
+"""The batch CLI must exit non-zero when discovery finds nothing or articles fail, and record parse failures"""
+import json
+
+import pytest
+
+import cli
+from pipeline import process_article
+from scraper.article_registry import FAILED, PENDING, ArticleRegistry
+
+ARTICLE = (
+    "<html><body><h1>Title</h1><div class='post-content'>"
+    + "".join(f"<p>Q: Question {i} about power?</p><p>Chomsky: {'The media and the state. ' * 30}</p>" for i in range(3))
+    + "</div></body></html>"
+)
+
+
+@pytest.fixture
+def run_cli(tmp_path, mock_llm, monkeypatch):
+    monkeypatch.setattr(cli, 'create_backend', lambda name: mock_llm.backend)
+
+    def run(url, *args):
+        return cli.main(['--url', url, '--cache-dir', str(tmp_path / 'cache'), '--output', str(tmp_path / 'out'),
+                         '--format', 'json', '--quiet'] + list(args))
+    return run
+
+
+def test_missing_index_exits_non_zero(site, run_cli, capsys):
+    assert run_cli(site.url('/chomsky.info/articles/')) == 1
+    assert "No article links found" in capsys.readouterr().err
+
+
+def test_index_without_links_exits_non_zero(site, run_cli):
+    url = site.add('/chomsky.info/articles/', "<html><body><p>Nothing here yet</p></body></html>")
+    assert run_cli(url) == 1
+    assert run_cli(url, '--full-archive') == 1
+
+
+def test_finished_run_exits_zero(site, run_cli, tmp_path):
+    article = site.add('/chomsky.info/20200101/', ARTICLE)
+    url = site.add('/chomsky.info/articles/', f"<html><body><ul><li><a href='{article}'>a</a></li></ul></body></html>")
+    assert run_cli(url) == 0
+    pairs = json.loads((tmp_path / 'out.json').read_text())
+    assert pairs and {pair['article_url'] for pair in pairs} == {article}
+
+
+def test_failed_articles_exit_non_zero(site, run_cli, mock_llm, capsys):
+    mock_llm.state.error_rate = 1.0
+    mock_llm.state.error_status = 400
+    article = site.add('/chomsky.info/20200101/', ARTICLE)
+    url = site.add('/chomsky.info/articles/', f"<html><body><ul><li><a href='{article}'>a</a></li></ul></body></html>")
+    assert run_cli(url) == 1
+    assert f"Error processing {article}" in capsys.readouterr().err
+
+
+def test_parse_failures_set_the_parse_status(tmp_path):
+    url = "https://chomsky.info/20200101/"
+    registry = ArticleRegistry(str(tmp_path / 'articles.db'))
+    registry.add_urls([url])
+    # Not a parsed element or HTML, so parse_dialogue raises
+    result = process_article({'url': url, 'title': "Title", 'content_node': 42}, registry=registry)
+    assert result['error'] and result['traceback']
+    assert registry.get(url)['parse_status'] == FAILED
+    assert registry.get(url)['qa_status'] == PENDING
+    registry.close()
@@ -0,0 +1,35 @@
+"""Concurrent dispatch must drop requests still waiting for rate-limit budget once a speaker has enough pairs"""
+import threading
+import time
+
+from processing.llm_backend import LLMBackend
+from processing.qa_generator import MAX_PAIRS_PER_SPEAKER, create_qa_pairs
+from records import Article, Paragraph
+
+# Enough requests fit in the budget to reach the pair cap; the rest of the speaker's requests must wait
+REQUESTS_PER_MINUTE = 6
+
+
+def paragraphs():
+    article = Article("Title", "2020-01-01", "https://chomsky.info/20200101/")
+    return [Paragraph("Noam Chomsky", " ".join(f"word{i}_{j}" for j in range(300)), article) for i in range(8)]
+
+
+def dispatch_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('ThreadPoolExecutor')]
+
+
+def test_requests_waiting_for_budget_are_dropped_after_the_cap(mock_llm):
+    backend = LLMBackend('mock', mock_llm.backend.api_url, 'mock-llm', requests_per_minute=REQUESTS_PER_MINUTE)
+    before = set(dispatch_threads())
+    started = time.monotonic()
+    pairs = create_qa_pairs(paragraphs(), concurrent=True, max_workers=4, backend=backend)
+    assert len(pairs) == MAX_PAIRS_PER_SPEAKER
+    assert time.monotonic() - started < 30
+
+    # Workers blocked on the one-minute budget give up instead of sending once it frees up
+    deadline = time.monotonic() + 5
+    while set(dispatch_threads()) - before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not set(dispatch_threads()) - before
+    assert mock_llm.state.stats()['requests'] == REQUESTS_PER_MINUTE
@@ -0,0 +1,58 @@
+"""DedupIndex and QADeduplicator must agree with the pairwise calculate_similarity scan they replace"""
+import random
+
+import pytest
+
+from processing.dedup import DedupIndex, QADeduplicator
+from processing.qa_generator import calculate_similarity
+from records import Article, QAPair
+
+# A small vocabulary, so random texts overlap enough to hit every threshold
+WORDS = [
+    "imperial", "power", "media", "consent", "propaganda", "policy", "war", "state",
+    "market", "labor", "history", "doctrine", "elite", "public", "control", "democracy",
+    "and", "the", "of", "what", "does", "how", "is", "an", "why", "Power", "MEDIA",
+]
+
+
+def random_text(rng, low=1, high=12):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.2, 0.4, 0.6, 0.9])
+@pytest.mark.parametrize("seed", range(5))
+def test_index_matches_pairwise_scan(threshold, seed):
+    rng = random.Random(seed)
+    index = DedupIndex(threshold)
+    accepted = []
+    for _ in range(200):
+        text = random_text(rng)
+        expected = any(calculate_similarity(text, other) > threshold for other in accepted)
+        assert index.is_duplicate(text) == expected, text
+        if not expected:
+            index.add(text)
+            accepted.append(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_deduplicator_matches_pairwise_acceptance(seed):
+    rng = random.Random(seed)
+    article = Article("Title", "2020", "https://chomsky.info/20200101/")
+    dedup = QADeduplicator(0.4, 0.6)
+    accepted = []
+    for _ in range(200):
+        pair = QAPair(random_text(rng), random_text(rng, 4, 20), "Noam Chomsky", article)
+        check_answer = rng.random() < 0.5
+        expected = not any(calculate_similarity(pair.question, q.question) > 0.4 for q in accepted)
+        if expected and check_answer:
+            expected = not any(calculate_similarity(pair.answer, q.answer) > 0.6 for q in accepted)
+        assert dedup.accept(pair, check_answer=check_answer) == expected
+        if expected:
+            accepted.append(pair)
+
+
+def test_texts_without_significant_words_never_match():
+    index = DedupIndex(0.0)
+    index.add("the and of")
+    assert not index.is_duplicate("what is the")
+    assert not index.is_duplicate("")
@@ -0,0 +1,72 @@
+"""ResponseCache must serve fresh entries from disk, revalidate stale ones and stay under its size cap"""
+import os
+
+from scraper.http_cache import ResponseCache
+
+
+def test_fresh_entries_are_served_without_a_request(tmp_path, site):
+    url = site.add('/page/', 'hello')
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    assert cache.get(url).content == b'hello'
+    response = cache.get(url)
+    assert response.content == b'hello' and response.from_cache
+    assert len(site.hits('/page/')) == 1
+    assert cache.stats() == {'hits': 1, 'revalidated': 0, 'misses': 1}
+
+
+def test_stale_entries_are_revalidated_with_their_etag(tmp_path, site):
+    url = site.add('/page/', 'hello', etag='"v1"')
+    cache = ResponseCache(str(tmp_path), ttl=0)
+    cache.get(url)
+    response = cache.get(url)
+    assert response.content == b'hello' and response.from_cache
+    assert site.hits('/page/')[1].get('If-None-Match') == '"v1"'
+    assert cache.stats() == {'hits': 0, 'revalidated': 1, 'misses': 1}
+
+    site.add('/page/', 'changed', etag='"v2"')
+    response = cache.get(url)
+    assert response.content == b'changed' and not response.from_cache
+    assert cache.get(url).content == b'changed'
+
+
+def test_ttl_override_forces_revalidation(tmp_path, site):
+    url = site.add('/index/', 'links', etag='"v1"')
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    cache.get(url)
+    cache.get(url, ttl=0)
+    assert len(site.hits('/index/')) == 2
+    assert cache.stats()['revalidated'] == 1
+
+
+def test_before_request_runs_only_on_network_fetches(tmp_path, site):
+    url = site.add('/page/', 'hello')
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    calls = []
+    cache.get(url, before_request=calls.append)
+    cache.get(url, before_request=calls.append)
+    assert calls == [url]
+
+
+def test_errors_are_not_cached(tmp_path, site):
+    url = site.url('/missing/')
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    assert cache.get(url).status_code == 404
+    assert cache.get(url).status_code == 404
+    assert len(site.hits('/missing/')) == 2
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, site):
+    urls = [site.add(f'/{i}/', str(i) * 40) for i in range(3)]
+    cache = ResponseCache(str(tmp_path), ttl=60, max_bytes=100)
+    cache.get(urls[0])
+    cache.get(urls[1])
+    # Age the first entry so it is the least recently used one
+    body_path = cache._paths(urls[0])[1]
+    os.utime(body_path, (1, 1))
+    cache.get(urls[2])
+
+    bodies = [name for name in os.listdir(tmp_path) if name.endswith('.body')]
+    assert len(bodies) == 2
+    assert not os.path.exists(body_path)
+    cache.get(urls[0])
+    assert len(site.hits('/0/')) == 2
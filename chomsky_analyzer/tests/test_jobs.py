@@ -0,0 +1,90 @@
+"""Jobs are keyed by their settings and credentials, and send their LLM requests to their own backend"""
+import time
+
+import pytest
+
+from jobs import DONE, FAILED, JobManager
+from processing import llm_backend
+from processing.llm_backend import LLMBackend
+from processing.mock_llm_server import start_mock_server
+
+ARTICLE = (
+    "<html><body><h1>Title</h1><div class='post-content'>"
+    + "".join(f"<p>Q: Question {i} about power?</p><p>Chomsky: {'The media and the state. ' * 30}</p>" for i in range(3))
+    + "</div></body></html>"
+)
+
+
+class _Deferred:
+    """Executor stand-in that never runs the submitted job, so it stays queued"""
+
+    def submit(self, *args):
+        pass
+
+
+@pytest.fixture
+def queued_manager():
+    manager = JobManager()
+    manager._executor = _Deferred()
+    return manager
+
+
+def _key(manager, job_id):
+    return manager._jobs[job_id].key
+
+
+def test_identical_requests_join_one_job(queued_manager):
+    backend = LLMBackend('mock', 'http://127.0.0.1:1/v1/chat/completions', 'mock-llm', api_key='secret')
+    first = queued_manager.submit('http://127.0.0.1:1/', limit=2, backend=backend)
+    again = LLMBackend('mock', backend.api_url, backend.model, api_key='secret')
+    assert queued_manager.submit('http://127.0.0.1:1/', limit=2, backend=again) == first
+    assert queued_manager.submit('http://127.0.0.1:1/', limit=3, backend=again) != first
+
+
+@pytest.mark.parametrize('changes', [
+    {'model': 'other-model'},
+    {'api_key': 'other-secret'},
+    {'api_url': 'http://127.0.0.1:2/v1/chat/completions'},
+])
+def test_backend_model_key_or_endpoint_change_the_job_key(queued_manager, changes):
+    options = dict(api_url='http://127.0.0.1:1/v1/chat/completions', model='mock-llm', api_key='secret')
+    first = queued_manager.submit('http://127.0.0.1:1/', backend=LLMBackend('mock', **options))
+    second = queued_manager.submit('http://127.0.0.1:1/', backend=LLMBackend('mock', **dict(options, **changes)))
+    assert second != first
+    assert _key(queued_manager, second) != _key(queued_manager, first)
+
+
+def test_api_key_is_not_stored_with_the_settings(queued_manager):
+    backend = LLMBackend('mock', 'http://127.0.0.1:1/v1/chat/completions', 'mock-llm', api_key='secret-key')
+    job = queued_manager._jobs[queued_manager.submit('http://127.0.0.1:1/', backend=backend)]
+    assert 'secret-key' not in repr(job.settings)
+    assert backend.fingerprint() not in repr(job.settings)
+    assert 'secret-key' not in job.key
+
+
+def _wait(manager, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while manager.get(job_id)['status'] not in (DONE, FAILED):
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.05)
+    return manager.get(job_id)
+
+
+def test_job_uses_its_own_backend(site, mock_llm, monkeypatch):
+    # The process-wide backend points at a different server, which must see no requests
+    other = start_mock_server(port=0, retry_after=0)
+    try:
+        other_url = f"http://127.0.0.1:{other.server_address[1]}/v1/chat/completions"
+        monkeypatch.setattr(llm_backend, '_backend', LLMBackend('mock', other_url, 'mock-llm'))
+
+        article = site.add('/chomsky.info/20200101/', ARTICLE)
+        url = site.add('/chomsky.info/articles/', f"<html><body><ul><li><a href='{article}'>a</a></li></ul></body></html>")
+        manager = JobManager()
+        job = _wait(manager, manager.submit(url, limit=1, backend=mock_llm.backend))
+
+        assert job['status'] == DONE and job['qa_pairs']
+        assert mock_llm.state.stats()['requests'] > 0
+        assert other.state.stats()['requests'] == 0
+    finally:
+        other.shutdown()
+        other.server_close()
@@ -0,0 +1,81 @@
+"""Archive discovery must find every article once, and the pipeline must fetch while links are still arriving"""
+import pytest
+
+from pipeline import process_articles
+from scraper.content_fetcher import extract_articles
+from scraper.link_discovery import discover_article_links, normalize_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.Chomsky.info/20200101", "https://chomsky.info/20200101/"),
+    ("https://chomsky.info:443//20200101/#comments", "https://chomsky.info/20200101/"),
+    ("http://chomsky.info:80/articles/?page=2", "http://chomsky.info/articles/?page=2"),
+    ("http://chomsky.info:8080/a/b.pdf", "http://chomsky.info:8080/a/b.pdf"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def article_list(*paths, extra=""):
+    items = "".join(f"<li><a href='{path}'>{path}</a></li>" for path in paths)
+    return f"<html><body><ul>{items}</ul>{extra}</body></html>"
+
+
+def test_index_pages_and_sitemaps_are_crawled(site):
+    base = site.add('/chomsky.info/articles/', article_list(
+        '/chomsky.info/20200101/', '/chomsky.info/20200102/',
+        extra="<a rel='next' href='/chomsky.info/articles/?page=2'>next</a>"))
+    site.add('/chomsky.info/articles/?page=2', article_list(
+        '/chomsky.info/20200102/#comments', 'https://www.chomsky.info:443/20200103/'))
+    site.add('/sitemap.xml', (
+        "<sitemapindex xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>"
+        f"<sitemap><loc>{site.url('/posts.xml')}</loc></sitemap></sitemapindex>"))
+    site.add('/posts.xml', (
+        "<urlset xmlns='http://www.sitemaps.org/schemas/sitemap/0.9'>"
+        f"<url><loc>{site.url('/chomsky.info/20200101/')}</loc></url>"
+        f"<url><loc>{site.url('/chomsky.info/20200104/')}</loc></url>"
+        f"<url><loc>{site.url('/about/')}</loc></url></urlset>"))
+
+    links = list(discover_article_links(base, max_workers=2))
+    assert sorted(links) == sorted([
+        site.url('/chomsky.info/20200101/'),
+        site.url('/chomsky.info/20200102/'),
+        site.url('/chomsky.info/20200104/'),
+        'https://chomsky.info/20200103/',
+    ])
+
+
+def test_max_pages_bounds_the_crawl(site):
+    base = site.add('/chomsky.info/articles/', article_list(
+        '/chomsky.info/20200101/', extra="<a href='/chomsky.info/articles/?page=2'>2</a>"))
+    site.add('/chomsky.info/articles/?page=2', article_list('/chomsky.info/20200102/'))
+    assert list(discover_article_links(base, max_pages=1, include_sitemap=False)) == [
+        site.url('/chomsky.info/20200101/')
+    ]
+
+
+def counting(urls, pulled):
+    for url in urls:
+        pulled.append(url)
+        yield url
+
+
+def article_urls(site, count):
+    body = "<html><body><h1>Title</h1><div class='post-content'><p>Noam Chomsky: Text.</p></div></body></html>"
+    return [site.add(f'/chomsky.info/2020{i:04d}/', body) for i in range(count)]
+
+
+def test_fetching_starts_before_the_url_source_is_exhausted(site):
+    pulled = []
+    fetched = extract_articles(counting(article_urls(site, 50), pulled), max_workers=2)
+    assert next(fetched)['title'] == 'Title'
+    assert len(pulled) < 50
+    fetched.close()
+
+
+def test_limit_stops_pulling_urls(site):
+    pulled = []
+    results = list(process_articles(counting(article_urls(site, 50), pulled), limit=3,
+                                    keep=lambda speakers: False))
+    assert len(results) == 3 and all(result['skipped'] for result in results)
+    assert len(pulled) == 3
@@ -0,0 +1,143 @@
+"""LLMClient must schedule requests under its RPM and TPM budgets and re-queue throttled ones"""
+import threading
+import time
+
+import pytest
+
+import http_client
+from processing import llm_client
+from processing.llm_client import LLMClient, parse_duration
+
+PAYLOAD = {"model": "m", "messages": [{"role": "user", "content": "hello"}], "max_tokens": 50}
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, body=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body if body is not None else {"usage": {"total_tokens": 10}}
+        self.closed = False
+
+    def json(self):
+        return self.body
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    """Queue of responses handed out by http_client.post, and the times the requests were sent"""
+    queue = []
+    sent = []
+
+    def post(url, **kwargs):
+        sent.append(time.monotonic())
+        return queue.pop(0) if queue else FakeResponse(200)
+
+    monkeypatch.setattr(http_client, 'post', post)
+    monkeypatch.setattr(llm_client, 'HTTP_MAX_RETRY_AFTER', 0.2)
+    return queue, sent
+
+
+@pytest.fixture
+def short_window(monkeypatch):
+    """A one-second budget window, so waiting for budget takes a second rather than a minute"""
+    monkeypatch.setattr(llm_client, 'WINDOW_SECONDS', 1.0)
+
+
+@pytest.mark.parametrize("value, seconds", [
+    ("7.66s", 7.66), ("2m59.56s", 179.56), ("120ms", 0.12), ("1h", 3600.0), ("3", 3.0), ("", None), ("soon", None),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
+
+
+def test_throttled_requests_are_requeued_and_closed(responses):
+    queue, sent = responses
+    throttled = FakeResponse(429, {'Retry-After': '0.1'})
+    unavailable = FakeResponse(503, {'Retry-After': '0'})
+    queue.extend([throttled, unavailable])
+    client = LLMClient("http://llm.test/v1/chat/completions")
+
+    response = client.post(PAYLOAD, {})
+    assert response.status_code == 200 and not response.closed
+    assert throttled.closed and unavailable.closed
+    assert len(sent) == 3
+    # Retry-After pauses scheduling before the next attempt
+    assert sent[1] - sent[0] >= 0.1
+    assert client.stats()['throttled'] == 1
+
+
+def test_last_attempt_is_returned_unclosed(responses):
+    queue, sent = responses
+    queue.extend(FakeResponse(429, {'Retry-After': '0'}) for _ in range(3))
+    client = LLMClient("http://llm.test/v1/chat/completions", max_attempts=3)
+    response = client.post(PAYLOAD, {})
+    assert response.status_code == 429 and not response.closed
+    assert len(sent) == 3
+
+
+def test_requests_per_minute(responses, short_window):
+    queue, sent = responses
+    client = LLMClient("http://llm.test/v1/chat/completions", requests_per_minute=2)
+    for _ in range(3):
+        client.post(PAYLOAD, {})
+    assert sent[1] - sent[0] < 0.5
+    assert sent[2] - sent[0] >= 0.9
+
+
+def test_tokens_per_minute_use_reported_usage(responses, short_window):
+    queue, sent = responses
+    client = LLMClient("http://llm.test/v1/chat/completions", tokens_per_minute=100)
+    # The estimate (prompt plus max_tokens) fits once; the reported usage of 10 frees the rest
+    client.post(PAYLOAD, {})
+    client.post(PAYLOAD, {})
+    assert sent[1] - sent[0] < 0.5
+    assert client.stats()['tokens_last_minute'] == 20
+
+    queue.append(FakeResponse(200, body={"usage": {"total_tokens": 90}}))
+    client.post(PAYLOAD, {})
+    client.post(PAYLOAD, {})
+    assert sent[3] - sent[2] >= 0.9
+
+
+def test_exhausted_budget_headers_pause_scheduling(responses):
+    queue, sent = responses
+    queue.append(FakeResponse(200, {'x-ratelimit-remaining-requests': '0', 'x-ratelimit-reset-requests': '150ms'}))
+    client = LLMClient("http://llm.test/v1/chat/completions")
+    client.post(PAYLOAD, {})
+    client.post(PAYLOAD, {})
+    assert sent[1] - sent[0] >= 0.14
+
+
+def test_cancel_stops_a_request_waiting_for_budget(responses, short_window):
+    queue, sent = responses
+    client = LLMClient("http://llm.test/v1/chat/completions", requests_per_minute=1)
+    client.post(PAYLOAD, {})
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+    started = time.monotonic()
+    assert client.post(PAYLOAD, {}, cancel=cancel) is None
+    assert time.monotonic() - started < 0.5
+    assert len(sent) == 1
+
+
+def test_streamed_retries_close_their_connections(mock_llm, monkeypatch):
+    mock_llm.state.error_rate = 1.0
+    closed = []
+    post = http_client.post
+
+    def tracking_post(*args, **kwargs):
+        response = post(*args, **kwargs)
+        close = response.close
+        response.close = lambda: (closed.append(response), close())
+        return response
+
+    monkeypatch.setattr(http_client, 'post', tracking_post)
+    client = LLMClient(mock_llm.backend.api_url, max_attempts=3)
+    with pytest.raises(llm_client.LLMRequestError):
+        list(client.stream(PAYLOAD, {}))
+    # Two re-queued attempts and the final rejected one
+    assert len(closed) == 3
+    assert mock_llm.state.stats()['requests'] == 3
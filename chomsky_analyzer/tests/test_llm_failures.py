@@ -0,0 +1,50 @@
+"""Articles whose LLM requests fail must be reported and recorded as failed, not as done with no pairs"""
+import pytest
+
+from pipeline import generate_article, _new_result
+from processing.llm_client import LLMRequestError
+from processing.qa_generator import create_qa_pairs
+from records import Article, Paragraph
+from scraper.article_registry import DONE, FAILED, ArticleRegistry
+
+URL = "https://chomsky.info/20200101/"
+
+
+def paragraphs():
+    article = Article("Title", "2020-01-01", URL)
+    text = " ".join(["power media consent policy war state labor history"] * 30)
+    return [Paragraph("Noam Chomsky", text, article) for _ in range(3)]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ArticleRegistry(str(tmp_path / 'articles.db'))
+    registry.add_urls([URL])
+    yield registry
+    registry.close()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_rejected_requests_raise(mock_llm, stream):
+    mock_llm.state.error_rate = 1.0
+    mock_llm.state.error_status = 400
+    with pytest.raises(LLMRequestError):
+        create_qa_pairs(paragraphs(), stream=stream, backend=mock_llm.backend)
+
+
+@pytest.mark.parametrize("llm_workers", [1, 4])
+def test_failed_articles_are_recorded_as_failed(mock_llm, registry, llm_workers):
+    mock_llm.state.error_rate = 1.0
+    mock_llm.state.error_status = 400
+    result = generate_article(_new_result(URL, "Title"), paragraphs(), registry=registry,
+                              llm_workers=llm_workers, backend=mock_llm.backend)
+    assert result['error'] and result['qa_pairs'] == []
+    assert registry.get(URL)['qa_status'] == FAILED
+    assert registry.pending_urls() == [URL]
+
+
+def test_answered_articles_are_recorded_as_done(mock_llm, registry):
+    result = generate_article(_new_result(URL, "Title"), paragraphs(), registry=registry,
+                              backend=mock_llm.backend)
+    assert result['error'] is None and result['qa_pairs']
+    assert registry.get(URL)['qa_status'] == DONE
@@ -0,0 +1,55 @@
+"""Streamed PDFs must match what PyFPDF writes for the same document, apart from the timestamp"""
+import io
+import random
+import re
+from itertools import groupby
+
+import pytest
+
+from processing.pdf_builder import PDFGenerator, write_pdf
+from records import Article, QAPair
+
+WORDS = ["power", "media", "consent", "policy", "war", "state", "labor", "history", "elite", "democracy"]
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_pairs(seed, articles=4):
+    """Q&A pairs grouped by article, with answers long enough to span pages and some non-ASCII text"""
+    rng = random.Random(seed)
+    pairs = []
+    for i in range(articles):
+        article = Article(f"Article {i} — “quoted” title", f"2020-01-0{i + 1}", f"https://chomsky.info/2020010{i + 1}/")
+        for _ in range(rng.randint(1, 12)):
+            answer = " ".join(sentence(rng, rng.randint(5, 30)) for _ in range(rng.randint(1, 40)))
+            pairs.append(QAPair(sentence(rng, rng.randint(4, 15)), answer, rng.choice(["Noam Chomsky", "Café"]), article))
+    return pairs
+
+
+def without_timestamp(data):
+    return re.sub(rb"/CreationDate \(D:\d+\)", b"", bytes(data))
+
+
+def fpdf_reference(pairs):
+    """The document write_pdf streams, built and written by FPDF itself"""
+    pdf = PDFGenerator()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+    for article, qa_pairs in groupby(pairs, key=lambda pair: pair.article):
+        pdf.chapter_title(article.title, article.date, article.url)
+        for qa in qa_pairs:
+            pdf.qa_block(qa.question, qa.answer, qa.speaker)
+        pdf.add_page()
+    return pdf.output(dest='S').encode('latin-1')
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_streamed_pdf_matches_fpdf_output(seed):
+    pairs = make_pairs(seed)
+    buffer = io.BytesIO()
+    pages = write_pdf(pairs, buffer)
+    assert pages > len({pair.article for pair in pairs})
+    assert without_timestamp(buffer.getvalue()) == without_timestamp(fpdf_reference(pairs))
+
@@ -0,0 +1,13 @@
+"""Chapters laid out in worker processes and merged must give the same PDF as serial rendering"""
+import pytest
+
+from processing.pdf_builder import create_pdf
+from test_pdf_builder import make_pairs, without_timestamp
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_parallel_pdf_matches_serial(seed):
+    pairs = make_pairs(seed)
+    serial = create_pdf(pairs)
+    assert without_timestamp(create_pdf(pairs, processes=2)) == without_timestamp(serial)
+    assert without_timestamp(create_pdf(pairs, processes=3)) == without_timestamp(serial)
@@ -0,0 +1,56 @@
+"""QAStreamParser must yield what re.findall yields on the finished completion, however it is chunked"""
+import random
+import re
+
+import pytest
+
+from processing.qa_generator import QAStreamParser
+
+QA_PATTERN = r"Q: (.*?)\nA: (.*?)(?=\n\s*Q:|\Z)"
+
+PIECES = [
+    "Q: ", "\nA: ", "\n", "\n\n", "  ", "\n  Q:", "\nQ:", "Q:", "A:", "Q", "A", ":",
+    "What does the text say?", "It says a great deal.", "Here are the pairs:", "1.", "words",
+]
+
+
+def parse_in_chunks(text, sizes):
+    parser = QAStreamParser()
+    pairs = []
+    position = 0
+    for size in sizes:
+        pairs.extend(parser.feed(text[position:position + size]))
+        position += size
+    pairs.extend(parser.feed(text[position:]))
+    pairs.extend(parser.close())
+    return pairs
+
+
+def chunk_sizes(rng, text):
+    sizes = []
+    while sum(sizes) < len(text):
+        sizes.append(rng.randint(1, 8))
+    return sizes
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "No pairs here.",
+    "Q: One?\nA: Yes.",
+    "Here you go:\n\nQ: First?\nA: One.\n\nQ: Second?\nA: Two\nlines.\n",
+    "Q: Indented next?\nA: Answer.\n   Q: Next?\nA: Last.",
+    "Q: Missing answer\nQ: Real?\nA: Real answer.",
+    "Q: Colon in answer?\nA: Q: is not at a line start here.\nQ: Then?\nA: Done.",
+])
+def test_examples_match_findall(text):
+    expected = re.findall(QA_PATTERN, text, re.DOTALL)
+    assert parse_in_chunks(text, [len(text)]) == expected
+    assert parse_in_chunks(text, [1] * len(text)) == expected
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_random_chunking_matches_findall(seed):
+    rng = random.Random(seed)
+    text = "".join(rng.choice(PIECES) for _ in range(rng.randint(0, 40)))
+    expected = re.findall(QA_PATTERN, text, re.DOTALL)
+    assert parse_in_chunks(text, chunk_sizes(rng, text)) == expected, repr(text)
@@ -0,0 +1,64 @@
+"""Records must still behave as the dicts they replaced, and Articles must stay usable as keys"""
+import pickle
+from collections.abc import Mapping
+
+import pytest
+
+from processing.pdf_builder import create_pdf
+from records import Article, Paragraph, QAPair, group_by_article, qa_pairs_from_dicts
+from test_pdf_builder import make_pairs, without_timestamp
+
+ARTICLE = Article("Title", "2020-01-01", "https://chomsky.info/20200101/")
+PAIR_DICT = {
+    'question': "Why?", 'answer': "Because.", 'speaker': "Noam Chomsky",
+    'article_title': "Title", 'article_date': "2020-01-01", 'article_url': "https://chomsky.info/20200101/",
+}
+
+
+def test_records_are_read_only_mappings():
+    pair = QAPair("Why?", "Because.", "Noam Chomsky", ARTICLE)
+    assert isinstance(pair, Mapping)
+    assert dict(pair) == pair.to_dict() == PAIR_DICT
+    assert list(pair) == list(PAIR_DICT) and len(pair) == len(PAIR_DICT)
+    assert 'article_url' in pair and 'article' not in pair and 'missing' not in pair
+    assert pair.get('missing', 1) == 1
+    assert sorted(pair.items()) == sorted(PAIR_DICT.items())
+    with pytest.raises(KeyError):
+        pair['missing']
+
+    paragraph = Paragraph("Noam Chomsky", "Text", ARTICLE)
+    assert dict(paragraph) == {'speaker': "Noam Chomsky", 'content': "Text", 'article_title': "Title",
+                               'article_date': "2020-01-01", 'article_url': "https://chomsky.info/20200101/"}
+
+
+def test_records_compare_by_type_and_fields():
+    pair = QAPair("Why?", "Because.", "Noam Chomsky", ARTICLE)
+    assert pair == qa_pairs_from_dicts([PAIR_DICT])[0]
+    assert pair != PAIR_DICT
+    assert pair != Paragraph("Noam Chomsky", "Because.", ARTICLE)
+    with pytest.raises(TypeError):
+        hash(pair)
+
+
+def test_articles_are_immutable():
+    article = Article("Title", "2020-01-01", "https://chomsky.info/20200101/")
+    groups = group_by_article([QAPair("Why?", "Because.", "Noam Chomsky", article)])
+    with pytest.raises(AttributeError):
+        article.url = "https://chomsky.info/other/"
+    with pytest.raises(AttributeError):
+        del article.title
+    assert article in groups and article == ARTICLE and hash(article) == hash(ARTICLE)
+
+
+def test_records_pickle_with_a_shared_article():
+    pairs = qa_pairs_from_dicts([PAIR_DICT, dict(PAIR_DICT, question="How?")])
+    copies = pickle.loads(pickle.dumps(pairs))
+    assert copies == pairs
+    assert copies[0].article is copies[1].article
+    with pytest.raises(AttributeError):
+        copies[0].article.title = "Other"
+
+
+def test_create_pdf_accepts_dicts():
+    pairs = make_pairs(0, articles=2)
+    assert without_timestamp(create_pdf([pair.to_dict() for pair in pairs])) == without_timestamp(create_pdf(pairs))
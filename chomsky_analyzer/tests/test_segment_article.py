@@ -0,0 +1,87 @@
+"""segment_article must cover the text exactly once in the fewest segments that fit, leaving no short segment"""
+import random
+
+import pytest
+
+from processing.qa_generator import _segments_to_ask, segment_article
+from processing.tokenizer import get_tokenizer
+
+WORDS = ["power", "media", "consent", "policy", "war", "state", "labor", "history", "elite", "democracy"]
+
+
+def paragraph(rng, sentences):
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 25))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+def random_text(rng):
+    return "\n\n".join(paragraph(rng, rng.randint(1, rng.choice([3, 10, 60]))) for _ in range(rng.randint(1, 30)))
+
+
+def characters(texts):
+    """Non-space characters in order, which a split or rejoined text keeps"""
+    return "".join("".join(texts).split())
+
+
+def greedy_count(text, max_tokens, tokenizer):
+    """Fewest segments for whole paragraphs, as plain greedy packing finds them"""
+    count, used = 1, 0
+    for para in text.split("\n\n"):
+        tokens = tokenizer.count(para)
+        if used and used + tokens > max_tokens:
+            count, used = count + 1, 0
+        used += tokens
+    return count
+
+
+@pytest.mark.parametrize("max_tokens, min_tokens", [(150, 30), (400, 100), (2000, 130)])
+@pytest.mark.parametrize("seed", range(30))
+def test_segments_cover_the_text_within_budget(seed, max_tokens, min_tokens):
+    rng = random.Random(seed)
+    text = random_text(rng)
+    tokenizer = get_tokenizer()
+    segments = segment_article(text, max_tokens, tokenizer, min_tokens)
+
+    assert characters(segments) == characters([text])
+    assert all(tokenizer.count(segment) <= max_tokens for segment in segments)
+    if len(segments) > 1:
+        assert min(tokenizer.count(segment) for segment in segments) >= min_tokens
+    if all(tokenizer.count(para) <= max_tokens for para in text.split("\n\n")):
+        assert len(segments) <= greedy_count(text, max_tokens, tokenizer)
+
+
+def test_paragraphs_stay_whole_when_sizes_can_be_evened():
+    tokenizer = get_tokenizer()
+    rng = random.Random(0)
+    paragraphs = [paragraph(rng, 4) for _ in range(9)]
+    segments = segment_article("\n\n".join(paragraphs), 3 * tokenizer.count(max(paragraphs, key=tokenizer.count)),
+                               tokenizer, min_tokens=10)
+    assert "\n\n".join(segments).split("\n\n") == paragraphs
+
+
+def test_short_tail_is_merged_into_its_neighbour():
+    tokenizer = get_tokenizer()
+    rng = random.Random(1)
+    long_paragraph = paragraph(rng, 40)
+    budget = tokenizer.count(long_paragraph) + 10
+    text = long_paragraph + "\n\n" + "A short closing remark about the state and its media."
+
+    segments = segment_article(text, budget, tokenizer, min_tokens=60)
+    assert len(segments) == 2
+    assert min(tokenizer.count(segment) for segment in segments) >= 60
+    assert characters(segments) == characters([text])
+    assert segments[-1].endswith("its media.")
+
+
+def test_short_texts_come_back_whole():
+    assert segment_article("Just a few words.") == ["Just a few words."]
+    assert segment_article("   ") == []
+
+
+def test_only_a_short_lone_segment_is_not_asked_about():
+    assert _segments_to_ask(["Just a few words."]) == []
+    long_text = " ".join(["word"] * 400)
+    assert _segments_to_ask([long_text]) == [long_text]
+    assert _segments_to_ask(["a " * 200, "b " * 200]) == ["a " * 200, "b " * 200]